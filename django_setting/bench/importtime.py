@@ -0,0 +1,70 @@
+"""
+Import-time budget check of the django-setting CLI, based on python -X importtime
+
+Fails (exit status 1) if importing django_setting.cli takes longer than the budget
+or pulls in a module that only the subcommands need.
+
+usage: python -m django_setting.bench.importtime [--budget-ms N]
+"""
+import argparse
+import subprocess
+import sys
+
+FORBIDDEN_MODULES = (
+    'concurrent.futures',
+    'django_setting.docker',
+    'django_setting.removeproject',
+    'django_setting.settings',
+    'django_setting.startproject',
+    'django_setting.utils',
+    'json',
+    'shutil',
+    'subprocess',
+)
+
+
+def measure(module='django_setting.cli'):
+    """
+    Import 'module' in a fresh interpreter with -X importtime
+
+    :return: (cumulative import time of 'module' in microseconds, set of imported module names)
+    """
+    p = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import %s' % module],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, check=True,
+    )
+    cumulative = 0
+    imported = set()
+    for line in p.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_time, cumulative_time, name = line[len('import time:'):].split('|')
+        name = name.strip()
+        imported.add(name)
+        if name == module:
+            cumulative = int(cumulative_time)
+    return cumulative, imported
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n\n')[0])
+    parser.add_argument('--budget-ms', type=float, default=30.0)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    results = [measure() for _ in range(args.repeat)]
+    best = min(cumulative for cumulative, _ in results) / 1000
+    imported = results[0][1]
+    forbidden = sorted(name for name in imported if name in FORBIDDEN_MODULES)
+
+    print('django_setting.cli import time: {:.1f} ms (budget {:.1f} ms)'.format(
+        best, args.budget_ms))
+    if forbidden:
+        print('Modules imported too early: {}'.format(', '.join(forbidden)))
+    if best > args.budget_ms or forbidden:
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,190 @@
+"""
+Settings-load benchmark of a generated project
+
+Imports config.settings.{base,debug,deploy} of the project in fresh interpreters
+(the virtualenv of the project by default) and measures the import time,
+the number of opened files, the JSON bytes parsed and the max RSS.
+With a baseline file, fails (exit status 1) when a result exceeds its threshold.
+
+usage: python -m django_setting.bench.settings_load <project_dir>
+           [--python PATH] [--repeat N] [--cold]
+           [--baseline FILE] [--update-baseline]
+           [--time-tolerance 0.25] [--rss-tolerance 0.10]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+MODULES = ('base', 'debug', 'deploy')
+
+
+class SkippedModule(Exception):
+    pass
+
+# 새 인터프리터에서 실행되는 측정 코드
+PROBE = r'''
+import json, os, resource, sys, time
+
+module_name = sys.argv[1]
+stats = {'opens': 0, 'json_bytes': 0}
+
+
+def audit(event, args):
+    if event == 'open':
+        stats['opens'] += 1
+
+
+_loads = json.loads
+
+
+def loads(s, *args, **kwargs):
+    stats['json_bytes'] += len(s)
+    return _loads(s, *args, **kwargs)
+
+
+json.loads = loads
+sys.addaudithook(audit)
+start = time.perf_counter()
+__import__(module_name)
+import_time = time.perf_counter() - start
+print(json.dumps({
+    'import_ms': import_time * 1000,
+    'opens': stats['opens'],
+    'json_bytes': stats['json_bytes'],
+    'rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+}))
+'''
+
+
+def get_project_python(project_dir):
+    """
+    Returns the python of the pyenv virtualenv of the project (<project name>-env),
+    or the current interpreter
+    """
+    from ..utils.common import get_pyenv_root
+    env_name = '%s-env' % os.path.basename(os.path.abspath(project_dir))
+    python = os.path.join(get_pyenv_root(), 'versions', env_name, 'bin', 'python')
+    return python if os.path.exists(python) else sys.executable
+
+
+def measure(project_dir, mode, python, cold=False):
+    """
+    Import config.settings.<mode> once in a fresh interpreter
+
+    :param mode: 'base', 'debug' or 'deploy' (base is imported with the debug config)
+    :param cold: remove the compiled config snapshot before the import
+    :return: dict of import_ms, opens, json_bytes, rss_kb
+    :raise SkippedModule: the settings raised ImproperlyConfigured (ex: deploy config missing)
+    """
+    django_dir = os.path.join(project_dir, 'django_app')
+    if cold:
+        snapshot_dir = os.path.join(project_dir, '.config_secret', 'compiled')
+        for name in os.listdir(snapshot_dir) if os.path.isdir(snapshot_dir) else ():
+            if name.endswith('.py'):
+                os.remove(os.path.join(snapshot_dir, name))
+    env = dict(os.environ)
+    env['DJANGO_SETTINGS_MODULE'] = 'config.settings.%s' % ('debug' if mode == 'base' else mode)
+    env['PYTHONPATH'] = django_dir
+    p = subprocess.run(
+        [python, '-c', PROBE, 'config.settings.%s' % mode],
+        cwd=django_dir, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        universal_newlines=True,
+    )
+    if p.returncode != 0 and 'ImproperlyConfigured' in p.stderr:
+        raise SkippedModule(p.stderr.strip().splitlines()[-1])
+    if p.returncode != 0:
+        raise RuntimeError('Importing config.settings.%s failed\n%s' % (mode, p.stderr))
+    return json.loads(p.stdout.strip().splitlines()[-1])
+
+
+def run(project_dir, python, repeat=5, cold=False):
+    """
+    :return: dict of mode: best result of 'repeat' runs (min of each value),
+             modes whose settings are not configured are skipped
+    """
+    results = {}
+    for mode in MODULES:
+        try:
+            runs = [measure(project_dir, mode, python, cold=cold) for _ in range(repeat)]
+        except SkippedModule as e:
+            print('Skipped config.settings.%s: %s' % (mode, e))
+            continue
+        results[mode] = {key: min(result[key] for result in runs) for key in runs[0]}
+    return results
+
+
+def compare(results, baseline, time_tolerance=0.25, rss_tolerance=0.10):
+    """
+    Compare the results with the baseline
+    import time may grow by 'time_tolerance' (+1ms for timer noise), RSS by 'rss_tolerance',
+    opened files and JSON bytes must not grow.
+
+    :return: list of failure messages
+    """
+    limits = {
+        'import_ms': lambda value: value * (1 + time_tolerance) + 1,
+        'opens': lambda value: value,
+        'json_bytes': lambda value: value,
+        'rss_kb': lambda value: value * (1 + rss_tolerance),
+    }
+    failures = []
+    for mode, result in results.items():
+        if mode not in baseline:
+            continue
+        for key, limit in limits.items():
+            if key in baseline[mode] and result[key] > limit(baseline[mode][key]):
+                failures.append('config.settings.{} {}: {:.1f} > {:.1f} (baseline {:.1f})'.format(
+                    mode, key, result[key], limit(baseline[mode][key]), baseline[mode][key]))
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n\n')[0])
+    parser.add_argument('project_dir')
+    parser.add_argument('--python', help='interpreter importing the settings '
+                                         '(default: the <project>-env pyenv virtualenv)')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--cold', action='store_true',
+                        help='remove the compiled config snapshot before each import')
+    parser.add_argument('--baseline',
+                        help='baseline file (default: <project>/.settings-bench.json)')
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument('--time-tolerance', type=float, default=0.25)
+    parser.add_argument('--rss-tolerance', type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    project_dir = os.path.abspath(args.project_dir)
+    python = args.python or get_project_python(project_dir)
+    baseline_file = args.baseline or os.path.join(project_dir, '.settings-bench.json')
+    results = run(project_dir, python, repeat=args.repeat, cold=args.cold)
+
+    print('{:26} {:>10} {:>6} {:>11} {:>9}'.format(
+        'module', 'import ms', 'opens', 'JSON bytes', 'RSS KB'))
+    for mode, result in results.items():
+        print('{:26} {:>10.1f} {:>6} {:>11} {:>9}'.format(
+            'config.settings.%s' % mode, result['import_ms'], result['opens'],
+            result['json_bytes'], result['rss_kb']))
+
+    if args.update_baseline:
+        baseline = {'cold': args.cold, 'modules': results}
+        open(baseline_file, 'wt').write(json.dumps(baseline, indent=4, sort_keys=True))
+        print('Baseline written: %s' % baseline_file)
+        return 0
+    if not os.path.exists(baseline_file):
+        print('No baseline (%s), run with --update-baseline to create it' % baseline_file)
+        return 0
+    baseline = json.loads(open(baseline_file).read())
+    if baseline['cold'] != args.cold:
+        # snapshot 유무에 따라 결과가 달라지므로 같은 조건의 baseline과만 비교
+        print('The baseline was measured %s --cold' % ('with' if baseline['cold'] else 'without'))
+        return 1
+    failures = compare(results, baseline['modules'], args.time_tolerance, args.rss_tolerance)
+    for failure in failures:
+        print('Regression: %s' % failure)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
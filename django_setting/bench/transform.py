@@ -0,0 +1,81 @@
+"""
+Micro-benchmark of the settings transformation (single-pass SettingsTransformer)
+against the previous chain of re.sub calls
+
+usage: python -m django_setting.bench.transform [settings.py] [--number N]
+"""
+import argparse
+import os
+import re
+import timeit
+
+from ..startproject.transform import get_settings_transformer
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGE_CODE_DIR = os.path.join(PACKAGE_DIR, 'codes')
+SAMPLE_SETTINGS_FILE = os.path.join(PACKAGE_DIR, 'files', 'bench', 'settings')
+
+
+def legacy_transform(settings, project_name, base_code, installed_apps_code):
+    """
+    The previous StartProject._get_secret_values + _sub_settings chain
+    (kept in step with the rules: 'import json' is no longer added since the settings
+    read their config through config_loader)
+    """
+    secret_regex = r'SECRET_KEY = \'(?P<secret_key>.*?)\'.*?\n'
+    secret_key = re.search(secret_regex, settings).group('secret_key')
+    settings = re.sub(secret_regex, '', settings)
+
+    replacements = {
+        'Django settings for config project.': 'Django settings for %s project.' % project_name,
+        r'\n(BASE_DIR.*?\n)': base_code,
+        re.compile(r'(# SECURITY WARNING: keep the secret.*?\n)', re.DOTALL): '',
+        re.compile(
+            r'(?P<before>\nTEMPLATES = .*?\n)(?P<indent>\s+)(?P<key>\'DIRS\': )(?P<value>\[\]),',
+            re.DOTALL
+        ): r'\g<before>\g<indent>\g<key>[\n\g<indent>    TEMPLATE_DIR,\n\g<indent>],',
+        re.compile(r'(\nINSTALLED_APPS = .*?)(\n])', re.DOTALL): installed_apps_code,
+    }
+    for src, target in replacements.items():
+        settings = re.sub(src, target, settings)
+    return settings, secret_key
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n\n')[0])
+    parser.add_argument('settings', nargs='?', default=SAMPLE_SETTINGS_FILE,
+                        help='settings.py rendered by django-admin (default: bundled sample)')
+    parser.add_argument('--number', type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    settings = open(args.settings).read()
+    base_code = open(os.path.join(PACKAGE_CODE_DIR, 'settings', 'base')).read()
+    installed_apps_code = open(
+        os.path.join(PACKAGE_CODE_DIR, 'settings', 'base_installed_apps')).read()
+    transformer = get_settings_transformer('bench', base_code, installed_apps_code)
+
+    result = transformer.transform(settings)
+    print('Rule matches:')
+    for name, count in result.matches.items():
+        print('  {:24}{}'.format(name, count))
+    try:
+        legacy_text, _ = legacy_transform(settings, 'bench', base_code, installed_apps_code)
+        print('Output identical to legacy chain: {}'.format(legacy_text == result.text))
+    except AttributeError:
+        print('Legacy chain failed on this settings file')
+        legacy_text = None
+
+    timings = {
+        'single pass': lambda: transformer.transform(settings),
+    }
+    if legacy_text is not None:
+        timings['legacy re.sub chain'] = lambda: legacy_transform(
+            settings, 'bench', base_code, installed_apps_code)
+    print('Timings (best of 5, {} runs):'.format(args.number))
+    for name, func in timings.items():
+        best = min(timeit.repeat(func, number=args.number, repeat=5)) / args.number
+        print('  {:24}{:.1f} us'.format(name, best * 1000000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,265 @@
+"""
+django-setting command line interface
+
+Subcommand modules are imported only when the subcommand runs,
+so usage errors, --help and shell completions don't pay for them.
+"""
+import argparse
+import os
+import sys
+
+__all__ = (
+    'get_parser',
+    'main',
+)
+
+CONFIG_ACTIONS = ('build', 'compile', 'seal', 'unseal', 'validate', 'export-env')
+
+
+def run_startproject(args):
+    if args.manifest:
+        from .startproject.bulk import BulkStartProject
+        return BulkStartProject(
+            args.manifest,
+            workers=args.workers,
+            refresh_wheelhouse=args.refresh_wheelhouse,
+            use_golden=not args.no_golden,
+        ).execute()
+    from .startproject import StartProject
+    StartProject(
+        args.project_name,
+        refresh_wheelhouse=args.refresh_wheelhouse,
+        use_golden=not args.no_golden,
+    ).execute()
+
+
+def run_removeproject(args):
+    from .removeproject import RemoveProject
+    RemoveProject(args.project_name).execute()
+
+
+def run_config(args):
+    if args.action == 'compile':
+        from .settings.snapshot import compile_settings
+        compile_settings(
+            os.path.join(os.getcwd(), args.project_name),
+            modes=[args.mode] if args.mode else None,
+        )
+        return
+    if args.action in ('seal', 'unseal'):
+        return run_config_seal(args)
+    if args.action == 'validate':
+        return run_config_validate(args)
+    if args.action == 'export-env':
+        return run_config_export_env(args)
+    from .settings import SettingsBuild, MissingAnswerError
+    from .settings.schema import SchemaError
+    from .settings.answers import Answers, DEFAULT_ENV_PREFIX
+    answers = Answers.from_sources(
+        answers_file=args.answers,
+        env_prefix=args.env_prefix or (DEFAULT_ENV_PREFIX if args.no_input else None),
+    )
+    try:
+        SettingsBuild(
+            args.project_name,
+            answers=answers,
+            mode=args.mode,
+            interactive=not args.no_input,
+            force=args.force,
+        ).execute()
+    except (MissingAnswerError, SchemaError) as e:
+        print(' ! %s' % e)
+        return False
+
+
+def run_config_validate(args):
+    from .settings.schema import SchemaError, validate_layers
+    from .utils.common import print_cmd_step, print_cmd_step_detail
+    from .utils.config import ConfigResolver
+    with print_cmd_step('Validate config files'):
+        try:
+            validated = validate_layers(
+                ConfigResolver(os.path.join(os.getcwd(), args.project_name)))
+        except SchemaError as e:
+            print(' ! %s' % e)
+            return False
+        print_cmd_step_detail('valid (%s)' % (
+            'checked: %s' % ', '.join(validated) if validated else 'cached'))
+
+
+def run_config_seal(args):
+    from .settings.seal import SealError, get_passphrase, seal_secrets, unseal_secrets
+    from .utils.common import print_cmd_step, print_cmd_step_detail
+    project_dir = os.path.join(os.getcwd(), args.project_name)
+    try:
+        passphrase = get_passphrase(confirm=args.action == 'seal')
+        if args.action == 'seal':
+            with print_cmd_step('Seal .config_secret'):
+                print_cmd_step_detail(seal_secrets(project_dir, passphrase, args.file))
+        else:
+            with print_cmd_step('Unseal .config_secret'):
+                for name in unseal_secrets(project_dir, passphrase, args.file):
+                    print_cmd_step_detail(name)
+    except SealError as e:
+        print(' ! %s' % e)
+        return False
+
+
+def run_config_export_env(args):
+    from .settings.export import export_env
+    from .utils.common import print_cmd_step, print_cmd_step_detail
+    project_dir = os.path.join(os.getcwd(), args.project_name)
+    mode = args.mode or 'deploy'
+    extension = 'conf' if args.format == 'supervisor' else 'env'
+    output = args.output or os.path.join(
+        project_dir, '.config_secret', '%s.%s' % (mode, extension))
+    with print_cmd_step('Export %s config' % mode):
+        export_env(project_dir, mode, fmt=args.format, output=output)
+        print_cmd_step_detail(output)
+
+
+def run_docker(args):
+    from .docker import DockerBuild, Recipe, RecipeError
+    from .settings.schema import SchemaError
+    try:
+        recipe = Recipe.from_sources(
+            recipe_file=args.recipe,
+            options=args.option or (),
+            start=args.start,
+            end=args.end,
+        )
+        DockerBuild(
+            args.project_name,
+            recipe=recipe,
+            interactive=not (args.no_input or args.recipe),
+            jobs=args.jobs,
+            force=args.force,
+            multi_stage=args.multi_stage,
+            render_only=args.render_only,
+        ).execute()
+    except (RecipeError, SchemaError) as e:
+        print(' ! %s' % e)
+        return False
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(
+        prog='django-setting',
+        description='Help set up project for Deployment, Docker, Secret key management',
+    )
+    parser.add_argument('--profile', metavar='PATH',
+                        help='write a JSON timing report (Chrome trace event format)')
+    subparsers = parser.add_subparsers(dest='command', metavar='command')
+    subparsers.required = True
+
+    startproject = subparsers.add_parser('startproject', help='create a Django project')
+    startproject.add_argument('project_name', nargs='?')
+    startproject.add_argument('--manifest', metavar='FILE',
+                              help='create every project listed in a YAML/JSON manifest')
+    startproject.add_argument('--workers', type=int,
+                              help='number of projects created at once with --manifest')
+    startproject.add_argument('--refresh-wheelhouse', action='store_true',
+                              help='build the cached wheels of the base packages again')
+    startproject.add_argument('--no-golden', action='store_true',
+                              help='create the virtualenv with pyenv virtualenv')
+    startproject.set_defaults(func=run_startproject)
+
+    removeproject = subparsers.add_parser(
+        'removeproject', help='remove a project folder and its virtualenv')
+    removeproject.add_argument('project_name')
+    removeproject.set_defaults(func=run_removeproject)
+
+    config = subparsers.add_parser(
+        'config', help='build the project config files',
+        description='actions: build (default), '
+                    'compile (write the resolved config snapshot of each mode), '
+                    'seal (encrypt .config_secret into secrets.sealed), '
+                    'unseal (decrypt secrets.sealed into .config_secret), '
+                    'validate (check the config files with their schema), '
+                    'export-env (write the resolved config as environment variables). '
+                    'seal/unseal read the passphrase from DJANGO_CONFIG_PASSPHRASE or a prompt',
+    )
+    config.add_argument('action_or_project_name', metavar='[action] project_name')
+    config.add_argument('project_name', nargs='?')
+    config.add_argument('--mode', choices=('debug', 'deploy'),
+                        help='build: mode to build (default: prompt), '
+                             'compile: mode to compile (default: all), '
+                             'export-env: mode to export (default: deploy)')
+    config.add_argument('--file', metavar='PATH',
+                        help='seal, unseal: sealed file (default: <project>/secrets.sealed)')
+    config.add_argument('--format', choices=('env', 'supervisor'), default='env',
+                        help='export-env: env file (KEY=value lines) '
+                             'or a supervisor environment= line')
+    config.add_argument('--output', metavar='FILE',
+                        help='export-env: file to write with permission 0600 '
+                             '(default: <project>/.config_secret/<mode>.env or .conf)')
+    config.add_argument('--answers', metavar='FILE',
+                        help='build: YAML/JSON file of the values to use instead of prompting')
+    config.add_argument('--env-prefix', metavar='PREFIX',
+                        help='build: read values from environment variables '
+                             '(ex: DJANGO_SETTING_COMMON__GITHUB__USERNAME)')
+    config.add_argument('--force', action='store_true',
+                        help='build: overwrite the config files edited in the project')
+    config.add_argument('--no-input', action='store_true',
+                        help='build: never prompt, fail on a value without an answer or default '
+                             '(reads DJANGO_SETTING_* environment variables)')
+    config.set_defaults(func=run_config)
+
+    docker = subparsers.add_parser(
+        'docker', help='render the Dockerfiles of the project and build the images',
+        description='SubOptions, start and end images are prompted unless they are given '
+                    'by a recipe file or flags (with --recipe or --no-input, nothing is prompted)',
+    )
+    docker.add_argument('project_name')
+    docker.add_argument('--recipe', metavar='FILE',
+                        help='YAML/JSON file of options, start, end, jobs, multi_stage, force')
+    docker.add_argument('--option', action='append', metavar='CATEGORY.ORDER=TITLE[,TITLE]',
+                        help='SubOption(s) of an option, several build separate branches '
+                             '(ex: extra.01=debug,deploy), can be repeated')
+    docker.add_argument('--start', metavar='IMAGE',
+                        help='start image name or number (default: 0, the root image)')
+    docker.add_argument('--end', metavar='IMAGE',
+                        help='end image name or number (default: the last image)')
+    docker.add_argument('--jobs', type=int, help='number of images built at once')
+    docker.add_argument('--force', action='store_true',
+                        help='build the images even if their content did not change')
+    docker.add_argument('--multi-stage', action='store_true',
+                        help='render one multi-stage BuildKit Dockerfile '
+                             'and build only the end images')
+    docker.add_argument('--render-only', action='store_true',
+                        help='write the Dockerfiles into <project>/.dockerfiles without building')
+    docker.add_argument('--no-input', action='store_true',
+                        help='never prompt, fail on an option without a selection')
+    docker.set_defaults(func=run_docker)
+    return parser
+
+
+def main(argv=None):
+    parser = get_parser()
+    args = parser.parse_args(argv)
+    if args.command == 'startproject' and not (args.project_name or args.manifest):
+        parser.error('startproject requires a project name or --manifest')
+    if args.command == 'config':
+        if args.project_name is None:
+            # 'config compile'처럼 action만 주어진 경우 프로젝트 이름으로 사용하지 않음
+            if args.action_or_project_name in CONFIG_ACTIONS:
+                parser.error('config %s requires a project name' % args.action_or_project_name)
+            args.action, args.project_name = 'build', args.action_or_project_name
+        else:
+            args.action = args.action_or_project_name
+        if args.action not in CONFIG_ACTIONS:
+            parser.error('config action must be one of: %s' % ', '.join(CONFIG_ACTIONS))
+
+    from .utils.common import print_cmd
+    from .utils.profiling import profiler
+    try:
+        with print_cmd(args.command):
+            result = args.func(args)
+    finally:
+        if args.profile:
+            profiler.write_report(args.profile)
+    return 1 if result is False else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
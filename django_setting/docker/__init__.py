@@ -1,13 +1,33 @@
-import json
 import os
-import re
-import subprocess
+from functools import partial
 
 from .cls import *
+from .context import *
+from .index import *
+from .multistage import *
+from .recipe import *
+from ..settings.schema import DOCKER_REQUIRED, validate_layers
+from ..utils import *
+
+__all__ = (
+    'DockerBuild',
+    'Recipe',
+    'RecipeError',
+)
 
 
 class DockerBuild:
-    def __init__(self, project_name):
+    def __init__(self, project_name, recipe=None, interactive=True, jobs=None, force=False,
+                 multi_stage=False, render_only=False):
+        """
+        :param recipe: Recipe used instead of prompting, only missing selections are prompted
+        :param interactive: False to raise RecipeError instead of prompting
+                            (start, end images default to the root and the last image)
+        :param jobs: number of images built at once (default: recipe, DJANGO_SETTING_JOBS, CPUs)
+        :param force: build images even if their content key label did not change
+        :param multi_stage: render one multi-stage BuildKit Dockerfile and build the end images
+        :param render_only: write the Dockerfiles without building
+        """
         self.CWD = os.getcwd()
         self.PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         self.PACKAGE_CODE_DIR = os.path.join(self.PACKAGE_DIR, 'codes')
@@ -34,10 +54,10 @@ class DockerBuild:
                                                       'settings_deploy.json')
         self.make_and_copy_config_files()
 
-        self.CONFIG_PUBLIC = json.loads(open(self.CONFIG_PUBLIC_FILE).read())
-        self.CONFIG_SECRET_COMMON = json.loads(open(self.CONFIG_SECRET_COMMON_FILE).read())
-        self.CONFIG_SECRET_DEBUG = json.loads(open(self.CONFIG_SECRET_DEBUG_FILE).read())
-        self.CONFIG_SECRET_DEPLOY = json.loads(open(self.CONFIG_SECRET_DEPLOY_FILE).read())
+        # 설정파일은 처음 사용할 때 읽음
+        self.config = ConfigResolver(self.PROJECT_DIR)
+        # 이미지 빌드 전에 설정값 확인 (SchemaError)
+        validate_layers(self.config, required=DOCKER_REQUIRED)
 
         # Django paths
         self.DJANGO_DIR = os.path.join(self.PROJECT_DIR, 'django_app')
@@ -46,24 +66,43 @@ class DockerBuild:
 
         # Docker build variables
         self.categories = []
-        self.root_image_name = self.CONFIG_PUBLIC['docker']['DockerfileBaseName']
+        self.root_image_name = self.config.public['docker']['DockerfileBaseName']
         self.start_image = None
         self.end_image = None
+        # selected_options에서 start_image, end_image의 위치
+        self.start_index = 0
+        self.end_index = None
         self.is_production = False
-        conf_dir = self.CONFIG_DOCKER_DIR
-        re_compile_category = re.compile(r'^([0-9]+)\.(.*)')
-        docker_conf_listdir = os.listdir(conf_dir)
-
-        for category in docker_conf_listdir:
-            if os.path.isdir(os.path.join(conf_dir, category)):
-                cur_category = DockerCategory(
-                    base_image_name=self.root_image_name,
-                    order=re_compile_category.search(category).group(1),
-                    title=re_compile_category.search(category).group(2),
-                    path=os.path.join(self.CONFIG_DOCKER_DIR, category),
-                )
-                self.categories.append(cur_category)
+        self.recipe = recipe or Recipe()
+        self.interactive = interactive
+        # 동시에 빌드할 이미지 branch 수
+        # (docker build는 daemon에서 실행되므로 CPU 수로 제한되는 공용 runner 대신 별도 runner 사용)
+        self.jobs = jobs or self.recipe.jobs or runner.limit
+        self.runner = Runner(limit=self.jobs)
+        # True면 content key가 같은 이미지가 있어도 다시 빌드
+        self.force = force or self.recipe.force
+        # True면 이미지마다 Dockerfile을 만드는 대신 하나의 multi-stage Dockerfile을 만들고
+        # 마지막 이미지들만 BuildKit으로 빌드 (--target)
+        self.multi_stage = multi_stage or self.recipe.multi_stage
+        self.render_only = render_only
 
+        # 카테고리 순서대로 이미지가 쌓이므로 정렬된 index 사용 (디렉토리 mtime이 같으면 cache)
+        self.option_index = DockerOptionIndex.load(self.CONFIG_DOCKER_DIR)
+        for category_entry in self.option_index.categories:
+            self.categories.append(DockerCategory(
+                base_image_name=self.root_image_name,
+                order=category_entry.order,
+                title=category_entry.title,
+                path=os.path.join(self.CONFIG_DOCKER_DIR, category_entry.name),
+                options=category_entry.options,
+            ))
+        # 모든 카테고리의 옵션 (이미지 순서)
+        self.options = tuple(option for category in self.categories for option in category.options)
+        self._selected_options = None
+        # 선택한 서브옵션의 이미지 이름: 이미지 번호
+        self.image_numbers = {}
+
+    def execute(self):
         self.print_intro()
         self.set_options()
         self.set_start_image()
@@ -88,8 +127,18 @@ class DockerBuild:
         print(intro_string)
 
     def set_options(self):
+        unknown = [key for key in self.recipe.options if self.option_index.get_option(*key) is None]
+        if unknown:
+            raise RecipeError('Unknown options in the recipe: {} (choices: {})'.format(
+                ', '.join('.'.join(key) for key in sorted(unknown)),
+                ', '.join('{}.{}'.format(option.category.title, option.order)
+                          for option in self.options)))
         for category in self.categories:
-            category.select_options()
+            category.select_options(self.recipe, self.interactive)
+        self._selected_options = None
+        self.image_numbers = {sub_option.info: index + 1
+                              for index, option in enumerate(self.options)
+                              for sub_option in option.selected_sub_options}
 
     @property
     def selected_options(self):
@@ -98,10 +147,12 @@ class DockerBuild:
         옵션 (00, 01, 02...등)에
         선택한 서브옵션 (03.extra - 01 - debug or production)들로 이루어진 리스트를 리턴
         서브옵션이 선택되지 않았을 경우 None이 원소로 반환됨
+        set_options 이후에는 다시 만들지 않음
         :return: list(DockerCategorySubOption)
         """
-        return [option.selected_sub_option for category in self.categories for option in
-                category.options]
+        if self._selected_options is None:
+            self._selected_options = [option.selected_sub_option for option in self.options]
+        return self._selected_options
 
     @property
     def is_selected_all_sub_options(self):
@@ -111,29 +162,61 @@ class DockerBuild:
         """
         return all(self.selected_options)
 
+    def get_level_info(self, index):
+        """
+        index번째 옵션에서 선택한 서브옵션들의 이미지 이름 (여러개일 경우 ' | '로 구분)
+        """
+        return ' | '.join(
+            sub_option.info for sub_option in self.options[index].selected_sub_options)
+
+    def get_image_number(self, value):
+        """
+        recipe의 start, end 값을 이미지 번호로 변환 (0: rootImageName, 1~: 각 옵션의 이미지)
+        :param value: image number or image name (ex: 3, 'greenwrap-base-02-pip')
+        :return: int
+        """
+        if isinstance(value, int) or str(value).isdigit():
+            number = int(value)
+            if not 0 <= number <= len(self.options):
+                raise RecipeError('Image number {} is not valid (0~{})'.format(
+                    number, len(self.options)))
+            return number
+        if value in self.image_numbers:
+            return self.image_numbers[value]
+        raise RecipeError('Image "{}" is not one of the selected images'.format(value))
+
     def set_start_image(self):
+        if self.recipe.start is not None or not self.interactive:
+            number = self.get_image_number(self.recipe.start or 0)
+            self.start_image = self.selected_options[number - 1] if number else None
+            self.start_index = number - 1 if number else 0
+            return
         select_string = 'Select start image:\n'
         select_string += '  {}.{}\n'.format(
-            0, self.CONFIG_PUBLIC['docker']['rootImageName'],
+            0, self.config.public['docker']['rootImageName'],
         )
         for index, option in enumerate(self.selected_options):
             select_string += '  {}.{}\n'.format(
                 index + 1,
-                option.info
+                self.get_level_info(index)
             )
         select_string = select_string[:-1]
         while True:
             print(select_string)
             selected_option_index = input(
                 '  > Select image number (default: {}.{}): '.format(
-                    0, self.CONFIG_PUBLIC['docker']['rootImageName']
+                    0, self.config.public['docker']['rootImageName']
                 )
             )
             try:
                 if selected_option_index == '' or selected_option_index == '0':
                     self.start_image = None
+                    self.start_index = 0
                 else:
-                    self.start_image = self.selected_options[int(selected_option_index) - 1]
+                    self.start_index = int(selected_option_index) - 1
+                    if self.start_index < 0:
+                        raise IndexError('list index out of range')
+                    self.start_image = self.selected_options[self.start_index]
                 print('')
                 break
             except ValueError as e:
@@ -142,14 +225,25 @@ class DockerBuild:
                 print('  ! Selected SubOption index is not valid ({})\n'.format(e))
 
     def set_end_image(self):
-        start_index = self.selected_options.index(self.start_image) if self.start_image else 0
+        start_index = self.start_index
+        if self.recipe.end is not None or not self.interactive:
+            if self.recipe.end is None:
+                number = len(self.selected_options)
+            else:
+                number = self.get_image_number(self.recipe.end)
+            if number - 1 < start_index:
+                raise RecipeError('The end image is before the start image')
+            self.end_image = self.selected_options[number - 1]
+            self.end_index = number - 1
+            self.is_production = number == len(self.selected_options)
+            return
         select_string = 'Select end image:\n'
         for index, option in enumerate(self.selected_options):
             if index < start_index:
                 continue
             select_string += '  {}.{}\n'.format(
                 index + 1,
-                option.info
+                self.get_level_info(index)
             )
         select_string = select_string[:-1]
         while True:
@@ -158,14 +252,17 @@ class DockerBuild:
             selected_option_index = input(
                 '  > Select image number (default: {}.{}): '.format(
                     default_index + 1,
-                    self.selected_options[default_index].info
+                    self.get_level_info(default_index)
                 )
             )
             try:
                 if selected_option_index == '':
                     selected_option_index = default_index + 1
                 int_selected_option_index = int(selected_option_index) - 1
+                if int_selected_option_index < start_index:
+                    raise IndexError('list index out of range')
                 self.end_image = self.selected_options[int_selected_option_index]
+                self.end_index = int_selected_option_index
                 print('')
                 # 만약 선택된 index가 default_index(마지막 인덱스)와 같을 경우 (끝 이미지를 선택한 경우)
                 # is_production을 True로 설정하고,
@@ -178,44 +275,137 @@ class DockerBuild:
             except IndexError as e:
                 print('  ! Selected SubOption index is not valid ({})\n'.format(e))
 
+    @property
+    def image_nodes(self):
+        """
+        선택한 서브옵션들로 이루어진 빌드 트리의 이미지 목록
+        여러 서브옵션을 선택한 옵션에서 branch가 나뉘고, 공통 부분(base, common...)은 한번만 포함됨
+        :return: list(DockerImageNode), 부모 이미지가 항상 앞에 오는 순서
+        """
+        nodes = []
+        parents = [None]
+        for category in self.categories:
+            for option in category.options:
+                parents = [DockerImageNode(sub_option, parent)
+                           for parent in parents for sub_option in option.selected_sub_options]
+                nodes.extend(parents)
+        return nodes
+
+    def build_image(self, node, dockerfile, content_key, target=None):
+        """
+        content_key와 같은 label을 가진 이미지가 이미 있으면 빌드하지 않음
+        :param target: multi-stage Dockerfile에서 빌드할 stage 이름
+        """
+        if not self.force and get_image_label(node.info) == content_key:
+            with self.runner.print_lock:
+                print_cmd_step_detail('[{}] up to date, skipped'.format(node.info))
+            return
+        build_command_template = 'docker build . -t {name} -f {dockerfile_name} ' \
+                                 '--label {label}={content_key}'
+        build_command = build_command_template.format(
+            name=node.info,
+            dockerfile_name=dockerfile,
+            label=CONTENT_KEY_LABEL,
+            content_key=content_key,
+        )
+        env = None
+        if target:
+            build_command += ' --target {}'.format(target)
+            env = dict(os.environ, DOCKER_BUILDKIT='1')
+        # 동시에 빌드되는 branch의 출력과 섞이지 않도록 runner의 print_lock 사용
+        with self.runner.print_lock:
+            print_cmd_step_detail('[{}] start'.format(node.info))
+        self.runner.run_sync(build_command, cwd=self.PROJECT_DIR, env=env, stream=True,
+                             prefix='[{}] '.format(node.info))
+        with self.runner.print_lock:
+            print_cmd_step_detail('[{}] done'.format(node.info))
+
     def make_dockerfiles(self):
-        start_index = self.selected_options.index(self.start_image) if self.start_image else None
-        end_index = self.selected_options.index(self.end_image)
-        root_image_name = self.CONFIG_PUBLIC['docker']['rootImageName']
+        """
+        start_image ~ end_image 사이의 이미지들의 Dockerfile을 만들고 빌드
+        각 이미지는 부모 이미지가 빌드되면 바로 시작되므로,
+        공통 부분은 한번만 빌드되고 이후의 branch들은 최대 self.jobs개까지 동시에 빌드됨
+        Dockerfile 내용과 COPY하는 파일들이 바뀌지 않은 이미지는 빌드하지 않음 (content key label)
+        """
+        start_index = self.start_index
+        end_index = self.end_index
+        root_image_name = self.config.public['docker']['rootImageName']
+        maintainer = self.config.common['docker']['maintainer']
 
         template = open(os.path.join(self.CONFIG_DOCKER_DIR, 'template.docker')).read()
         print('== Make Dockerfiles ==')
         # self.PROJECT_DIR부터 .dockerfiles디렉토리 생성 (임시 Dockerfile들 저장소)
         os.makedirs(os.path.join(self.PROJECT_DIR, '.dockerfiles'), exist_ok=True)
         dockerfiles_dir = os.path.join(self.PROJECT_DIR, '.dockerfiles')
-        for index, option in enumerate(self.selected_options):
-            if (start_index and index < start_index) or index > end_index:
-                continue
-            file_name = 'Dockerfile.{}.{}.{}.{}'.format(
-                option.parent_option.category.order,
-                option.parent_option.category.title,
-                option.parent_option.order,
-                option.title)
-            print(file_name)
-            prev_image = self.selected_options[index - 1].info if index > 0 else root_image_name
+        # --render-only는 빌드하지 않으므로 build context를 hash하지 않음 (content key 없음)
+        context_hasher = None if self.render_only else ContextHasher(self.PROJECT_DIR)
+        content_keys = {}
+        # 빌드 범위의 (이미지, 내용) 목록
+        nodes = []
+        for node in self.image_nodes:
+            content = open(os.path.join(node.sub_option.path), 'rt').read()
             cur_template = template.format(
-                from_image=prev_image,
-                maintainer=self.CONFIG_SECRET_COMMON['docker']['maintainer'],
-                content=open(os.path.join(option.path), 'rt').read(),
+                from_image=node.parent.info if node.parent else root_image_name,
+                maintainer=maintainer,
+                content=content,
             )
-            open(os.path.join(dockerfiles_dir, file_name), 'wt').write(cur_template)
-            # is_production일 경우 마지막 loop의 파일을 프로젝트폴더/Dockerfile에 기록
-            if self.is_production and index == len(self.selected_options) - 1:
+            # 빌드하지 않는 부모 이미지의 key도 자식 이미지의 key에 포함되므로 모든 이미지의 key를 계산
+            if context_hasher:
+                content_keys[node.info] = get_content_key(
+                    cur_template, context_hasher,
+                    content_keys[node.parent.info] if node.parent else None)
+            if start_index <= node.level <= end_index:
+                nodes.append((node, content, cur_template))
+        if context_hasher:
+            context_hasher.save()
+
+        # is_production일 경우 마지막 옵션의 파일을 프로젝트폴더/Dockerfile에 기록
+        # (dockerHubImageName을 기반으로 하므로 branch와 관계없이 같은 내용)
+        for node, content, cur_template in nodes:
+            if self.is_production and node.level == len(self.selected_options) - 1:
                 cur_template = template.format(
-                    from_image=self.CONFIG_PUBLIC['docker']['dockerHubImageName'],
-                    maintainer=self.CONFIG_SECRET_COMMON['docker']['maintainer'],
-                    content=open(os.path.join(option.path), 'rt').read(),
+                    from_image=self.config.public['docker']['dockerHubImageName'],
+                    maintainer=maintainer,
+                    content=content,
                 )
                 open(os.path.join(self.PROJECT_DIR, 'Dockerfile'), 'wt').write(cur_template)
+                break
 
-            build_command_template = 'docker build . -t {name} -f {dockerfile_name}'
-            build_command = build_command_template.format(
-                name=option.info,
-                dockerfile_name=os.path.join(dockerfiles_dir, file_name),
-            )
-            subprocess.run(build_command, shell=True)
+        scheduler = StepScheduler(max_workers=self.jobs)
+        if self.multi_stage:
+            # start_image 이전의 이미지는 이미 빌드된 이미지를 FROM으로 사용
+            stages = [(
+                node.info,
+                node.parent.info if node.parent else root_image_name,
+                content,
+            ) for node, content, cur_template in nodes]
+            dockerfile = os.path.join(dockerfiles_dir, MULTI_STAGE_FILE_NAME)
+            print_cmd_step_detail(MULTI_STAGE_FILE_NAME)
+            self.write_dockerfile(dockerfile, render_multi_stage(template, stages, maintainer))
+            # 마지막 이미지들만 빌드, 공통 stage는 BuildKit cache로 공유됨
+            for node, content, cur_template in nodes:
+                if node.level == end_index:
+                    scheduler.add(node.info, partial(
+                        self.build_image, node, dockerfile, content_keys.get(node.info),
+                        target=node.info))
+        else:
+            for node, content, cur_template in nodes:
+                print_cmd_step_detail(node.file_name)
+                dockerfile = os.path.join(dockerfiles_dir, node.file_name)
+                self.write_dockerfile(dockerfile, cur_template)
+                # start_image 이전의 부모 이미지는 이미 빌드되어 있다고 가정
+                requires = [node.parent.info] if node.parent and node.level > start_index else []
+                scheduler.add(node.info, partial(
+                    self.build_image, node, dockerfile, content_keys.get(node.info)), requires)
+
+        if self.render_only:
+            return
+        print('== Build images (jobs: {}) =='.format(self.jobs))
+        scheduler.run()
+        scheduler.print_report()
+
+    @staticmethod
+    def write_dockerfile(path, content):
+        # 내용이 같으면 다시 쓰지 않음
+        if not os.path.exists(path) or open(path, 'rt').read() != content:
+            atomic_write(path, content)
@@ -1,42 +1,37 @@
-import os
-import re
+from .index import scan_category
+from .recipe import RecipeError
 
 __all__ = (
     'DockerCategory',
     'DockerCategoryOption',
     'DockerCategorySubOption',
+    'DockerImageNode',
 )
 
 
 class DockerCategory:
     def __init__(self, base_image_name, order, title, path, options=None):
+        """
+        :param options: tuple(OptionEntry) of the category (DockerOptionIndex),
+                        scanned from 'path' if not given
+        """
         self.base_image_name = base_image_name
         self.order = order
         self.title = title
         self.path = path
         self.options = []
 
-        re_compile_option = re.compile(r'^([0-9]+)\.(.*)\.docker')
-
-        option_listdir = os.listdir(self.path)
-        # 각 카테고리(00.template, 01.base...)내의 파일들을 순회
-        for option in option_listdir:
-            # 03.extra의 01.debug, 01.production...도 순회
-            cur_option_order = re_compile_option.search(option).group(1)
-            # Option인스턴스의 order가 cur_option_order(00, 01등)과 같은 Option이 self.options리스트 목록에 없을 경우 새로 만들어 줌
-            if not any(option.order == cur_option_order for option in self.options):
-                cur_option = DockerCategoryOption(category=self, order=cur_option_order)
-                self.options.append(cur_option)
-            # 같은 옵션번호를 가질 경우 cur_option은 같은 DockerCategoryOption객체를 사용
-            cur_option = next(
-                (option for option in self.options if option.order == cur_option_order), None)
-            # 파일 하나하나가 서브옵션이므로 각 루프마다 서브옵션을 생성, 추가
-            cur_sub_option = DockerCategorySubOption(
-                parent_option=cur_option,
-                order=cur_option_order,
-                title=re_compile_option.search(option).group(2)
-            )
-            cur_option.sub_options.append(cur_sub_option)
+        # 각 옵션(00, 01...)과 서브옵션(03.extra의 01.debug, 01.deploy...)은 index에서 정렬되어 있음
+        for option_entry in options if options is not None else scan_category(self.path):
+            cur_option = DockerCategoryOption(category=self, order=option_entry.order)
+            # 파일 하나하나가 서브옵션
+            for sub_option_entry in option_entry.sub_options:
+                cur_option.sub_options.append(DockerCategorySubOption(
+                    parent_option=cur_option,
+                    order=sub_option_entry.order,
+                    title=sub_option_entry.title,
+                ))
+            self.options.append(cur_option)
 
     def __str__(self):
         ret = 'DockerCategory({}.{})\n'.format(self.order, self.title)
@@ -64,9 +59,12 @@ class DockerCategory:
             raise Exception('require option select')
         return [sub_option for option in self.options for sub_option in option.sub_options]
 
-    def select_options(self):
+    def select_options(self, recipe=None, interactive=True):
         for option in self.options:
-            option.select_sub_option()
+            option.select_sub_option(
+                titles=recipe.get_option(option) if recipe else None,
+                interactive=interactive,
+            )
 
 
 class DockerCategoryOption:
@@ -75,6 +73,8 @@ class DockerCategoryOption:
         self.order = order
         self.sub_options = options if options else []
         self.selected_sub_option = None
+        # 여러 서브옵션을 선택한 경우 각각이 별도의 이미지 branch가 됨
+        self.selected_sub_options = []
 
     def __repr__(self):
         return 'Option(Category:[{}], Order:[{}])'.format(
@@ -95,9 +95,36 @@ class DockerCategoryOption:
         else:
             return self.sub_options[0]
 
-    def select_sub_option(self):
+    @property
+    def is_branch(self):
+        return len(self.selected_sub_options) > 1
+
+    def select_sub_option(self, titles=None, interactive=True):
+        """
+        Several SubOptions can be selected, separated by commas (ex: 1,2)
+        Each of them is built as a separate branch on top of the previous images.
+
+        서브옵션 선택 (쉼표로 구분해 여러개 선택 가능)
+        :param titles: titles of the SubOptions to select instead of prompting
+        :param interactive: False to raise RecipeError instead of prompting
+        :return: first selected DockerCategorySubOption
+        """
         self.selected_sub_option = None
-        if self.is_require_select_option:
+        self.selected_sub_options = []
+        if titles:
+            sub_options = {sub_option.title: sub_option for sub_option in self.sub_options}
+            for title in titles:
+                if title not in sub_options:
+                    raise RecipeError('{}.{} has no SubOption "{}" (choices: {})'.format(
+                        self.category.title, self.order, title, ', '.join(sorted(sub_options))))
+                if sub_options[title] not in self.selected_sub_options:
+                    self.selected_sub_options.append(sub_options[title])
+            self.selected_sub_option = self.selected_sub_options[0]
+        elif self.is_require_select_option and not interactive:
+            raise RecipeError('Select a SubOption of {}.{} ({})'.format(
+                self.category.title, self.order,
+                ', '.join(sub_option.title for sub_option in self.sub_options)))
+        elif self.is_require_select_option:
             select_string = 'Category({}.{})\n - Option({})\n -- SubOption select:\n'.format(
                 self.category.order,
                 self.category.title,
@@ -111,10 +138,17 @@ class DockerCategoryOption:
             select_string = select_string[:-1]
             while True:
                 print(select_string)
-                selected_sub_option_index = input('  > Select SubOption: ')
+                selected_sub_option_index = input('  > Select SubOption (ex: 1 or 1,2): ')
                 try:
-                    selected_sub_option = self.sub_options[int(selected_sub_option_index) - 1]
-                    self.selected_sub_option = selected_sub_option
+                    selected_sub_options = []
+                    for index in selected_sub_option_index.split(','):
+                        int_index = int(index) - 1
+                        if int_index < 0:
+                            raise IndexError('list index out of range')
+                        if self.sub_options[int_index] not in selected_sub_options:
+                            selected_sub_options.append(self.sub_options[int_index])
+                    self.selected_sub_options = selected_sub_options
+                    self.selected_sub_option = selected_sub_options[0]
                     print('')
                     break
                 except ValueError as e:
@@ -124,6 +158,7 @@ class DockerCategoryOption:
 
         else:
             self.selected_sub_option = self.unique_sub_option
+            self.selected_sub_options = [self.selected_sub_option]
             # print('Don\'t need select SubOption. This Option has unique SubOption')
         return self.selected_sub_option
 
@@ -153,3 +188,43 @@ class DockerCategorySubOption:
             self.order,
             self.title
         )
+
+
+class DockerImageNode:
+    """
+    One image of the build tree (a selected SubOption built on top of 'parent')
+
+    빌드 트리의 이미지 하나 (parent 이미지 위에 빌드되는 서브옵션)
+    """
+
+    def __init__(self, sub_option, parent=None):
+        self.sub_option = sub_option
+        self.parent = parent
+        self.children = []
+        self.level = parent.level + 1 if parent else 0
+        # 위쪽 branch에서 선택된 서브옵션 title들 (같은 서브옵션이 여러 branch에 있을 때 이미지 이름 구분)
+        if parent is None:
+            self.branch = ()
+        elif parent.sub_option.parent_option.is_branch:
+            self.branch = parent.branch + (parent.sub_option.title,)
+        else:
+            self.branch = parent.branch
+        if parent:
+            parent.children.append(self)
+
+    def __repr__(self):
+        return 'DockerImageNode({})'.format(self.info)
+
+    @property
+    def info(self):
+        """
+        Image name, the SubOption info followed by the titles of the branches above
+        ex) base-extra-02-production-debug
+        """
+        return '-'.join((self.sub_option.info,) + self.branch)
+
+    @property
+    def file_name(self):
+        option = self.sub_option.parent_option
+        return '.'.join(('Dockerfile', option.category.order, option.category.title,
+                         option.order, self.sub_option.title) + self.branch)
@@ -0,0 +1,207 @@
+import fnmatch
+import hashlib
+import json
+import os
+import shlex
+
+from ..utils import *
+
+__all__ = (
+    'CONTENT_KEY_LABEL',
+    'get_copy_sources',
+    'ContextHasher',
+    'get_content_key',
+    'get_image_label',
+)
+
+# 이미지에 기록되는 content key label 이름
+CONTENT_KEY_LABEL = 'django-setting.content-key'
+# 빌드할 때마다 새로 쓰여지는 파일들이므로 context hash에서 제외 (이미지 동작과 무관)
+EXCLUDED_DIRS = ('.dockerfiles',)
+
+
+def get_copy_sources(content):
+    """
+    Source paths of the COPY/ADD instructions of a Dockerfile
+    (COPY --from=<stage> and remote ADD urls are not part of the build context)
+
+    Dockerfile의 COPY/ADD 명령어들이 build context에서 가져오는 경로 목록
+    :param content: Dockerfile text
+    :return: list of paths relative to the build context
+    """
+    sources = []
+    for line in content.splitlines():
+        parts = line.strip().split(None, 1)
+        if len(parts) != 2 or parts[0].upper() not in ('COPY', 'ADD'):
+            continue
+        arguments = parts[1].strip()
+        if arguments.startswith('['):
+            arguments = json.loads(arguments)
+        else:
+            arguments = shlex.split(arguments)
+        flags = [argument for argument in arguments if argument.startswith('--')]
+        paths = [argument for argument in arguments if not argument.startswith('--')]
+        if any(flag.startswith('--from') for flag in flags):
+            continue
+        for path in paths[:-1]:
+            if '://' not in path:
+                sources.append(path)
+    return sources
+
+
+class ContextHasher:
+    """
+    Hashes files of the docker build context, honoring .dockerignore
+    '<project>/.dockerfiles/.context-hashes.json' records the stat and hash of each file,
+    so an unchanged file costs one stat call.
+
+    docker build context의 파일 hash (stat이 그대로인 파일은 다시 읽지 않음)
+    """
+
+    def __init__(self, context_dir, cache_file=None):
+        self.context_dir = context_dir
+        self.cache_file = cache_file or os.path.join(
+            context_dir, '.dockerfiles', '.context-hashes.json')
+        try:
+            self.cache = json.loads(open(self.cache_file).read())
+        except (OSError, ValueError):
+            self.cache = {}
+        self.hashes = {}
+        self.source_hashes = {}
+        self.ignore_patterns = self._load_ignore_patterns()
+
+    def _load_ignore_patterns(self):
+        patterns = []
+        try:
+            lines = open(os.path.join(self.context_dir, '.dockerignore')).read().splitlines()
+        except OSError:
+            return patterns
+        for line in lines:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            exclude = not line.startswith('!')
+            pattern = os.path.normpath(line.lstrip('!').strip('/'))
+            patterns.append((pattern, exclude))
+        return patterns
+
+    def is_ignored(self, rel_path):
+        if rel_path.split(os.sep)[0] in EXCLUDED_DIRS:
+            return True
+        ignored = False
+        # 마지막으로 일치한 pattern이 결정 ('!pattern'은 다시 포함)
+        for pattern, exclude in self.ignore_patterns:
+            if fnmatch.fnmatch(rel_path, pattern) or rel_path.startswith(pattern + os.sep):
+                ignored = exclude
+        return ignored
+
+    def file_hash(self, rel_path):
+        if rel_path in self.hashes:
+            return self.hashes[rel_path]
+        path = os.path.join(self.context_dir, rel_path)
+        stat = os.stat(path)
+        stat = [stat.st_mtime_ns, stat.st_size]
+        entry = self.cache.get(rel_path)
+        if entry and entry['stat'] == stat:
+            digest = entry['hash']
+        else:
+            digest = file_hash(path)
+        self.hashes[rel_path] = digest
+        return digest
+
+    def files(self, source):
+        """
+        :param source: COPY/ADD source (a file, a directory or a glob pattern)
+        :return: sorted list of context file paths under 'source'
+        """
+        paths = []
+        source = os.path.normpath(source.lstrip('/'))
+        if any(c in source for c in '*?['):
+            matches = sorted(fnmatch.filter(self._list_dir(os.path.dirname(source)), source))
+        else:
+            matches = [source]
+        # '!pattern'이 없으면 제외된 디렉토리 아래는 탐색하지 않음
+        prune = not any(not exclude for pattern, exclude in self.ignore_patterns)
+        for match in matches:
+            full_path = os.path.join(self.context_dir, match)
+            if os.path.isdir(full_path):
+                for dir_path, dir_names, file_names in os.walk(full_path):
+                    rel_dir = os.path.relpath(dir_path, self.context_dir)
+                    if prune:
+                        dir_names[:] = [name for name in dir_names if not self.is_ignored(
+                            os.path.normpath(os.path.join(rel_dir, name)))]
+                    dir_names.sort()
+                    for file_name in file_names:
+                        paths.append(os.path.normpath(os.path.join(rel_dir, file_name)))
+            elif os.path.exists(full_path):
+                paths.append(match)
+        return sorted(path for path in paths if not self.is_ignored(path))
+
+    def _list_dir(self, rel_dir):
+        try:
+            names = os.listdir(os.path.join(self.context_dir, rel_dir))
+        except OSError:
+            return []
+        return [os.path.normpath(os.path.join(rel_dir, name)) for name in names]
+
+    def hash_sources(self, sources):
+        """
+        :return: sha256 hex digest of the paths and contents of the files of 'sources'
+        """
+        key = tuple(sources)
+        if key not in self.source_hashes:
+            digest = hashlib.sha256()
+            for source in sources:
+                for path in self.files(source):
+                    digest.update(('%s\0%s\n' % (path, self.file_hash(path))).encode('utf-8'))
+            self.source_hashes[key] = digest.hexdigest()
+        return self.source_hashes[key]
+
+    def save(self):
+        """
+        Record the stat and hash of the files hashed in this run
+        """
+        cache = {}
+        for rel_path, digest in self.hashes.items():
+            stat = os.stat(os.path.join(self.context_dir, rel_path))
+            cache[rel_path] = {'stat': [stat.st_mtime_ns, stat.st_size], 'hash': digest}
+        if cache != self.cache:
+            atomic_write(self.cache_file, json.dumps(cache, sort_keys=True))
+            self.cache = cache
+
+
+def get_content_key(dockerfile, context_hasher, parent_key=None):
+    """
+    Content key of an image: its Dockerfile text, the files its COPY/ADD lines use
+    and the content key of its parent image
+
+    이미지의 content key (Dockerfile 내용 + COPY하는 파일들의 hash + 부모 이미지의 key)
+    :param dockerfile: Dockerfile text
+    :param context_hasher: ContextHasher of the build context
+    :param parent_key: content key of the FROM image, None for an external image
+    :return: sha256 hex digest
+    """
+    digest = hashlib.sha256()
+    digest.update((parent_key or '').encode('utf-8') + b'\0')
+    digest.update(dockerfile.encode('utf-8') + b'\0')
+    digest.update(context_hasher.hash_sources(get_copy_sources(dockerfile)).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def get_image_label(image, label=CONTENT_KEY_LABEL):
+    """
+    :return: value of 'label' of the local image, None if the image or the label does not exist
+    """
+    try:
+        result = runner.run_sync(
+            ['docker', 'image', 'inspect', '--format', '{{ json .Config.Labels }}', image],
+            check=False)
+    except OSError:
+        return None
+    if result.returncode != 0:
+        return None
+    try:
+        labels = json.loads(result.stdout.strip() or 'null')
+    except ValueError:
+        return None
+    return (labels or {}).get(label)
@@ -0,0 +1,199 @@
+import hashlib
+import json
+import os
+import re
+from collections import namedtuple
+
+from ..utils import *
+
+__all__ = (
+    'CategoryEntry',
+    'OptionEntry',
+    'SubOptionEntry',
+    'DockerOptionIndex',
+    'get_order_key',
+    'scan_category',
+)
+
+RE_CATEGORY = re.compile(r'^([0-9]+)\.(.+)$')
+RE_SUB_OPTION = re.compile(r'^([0-9]+)\.(.+)\.docker$')
+
+CategoryEntry = namedtuple('CategoryEntry', ('order', 'title', 'name', 'options'))
+OptionEntry = namedtuple('OptionEntry', ('order', 'sub_options'))
+SubOptionEntry = namedtuple('SubOptionEntry', ('order', 'title', 'name'))
+
+# cache 형식이나 scan 규칙이 바뀌면 올려서 이전 cache를 사용하지 않도록 함
+INDEX_VERSION = 2
+# 최근 사용한 프로젝트의 index cache만 유지
+CACHE_KEEP = 32
+
+
+def get_order_key(order):
+    """
+    '1'과 '01'처럼 자리수만 다른 번호를 같은 번호로 취급
+    :param order: option order (ex: '01')
+    :return: int for a number, 'order' otherwise
+    """
+    order = str(order)
+    return int(order) if order.isdigit() else order
+
+
+def _sort_key(match):
+    # '1.x'와 '01.x'처럼 자리수가 다른 번호도 숫자 순서로, 같은 번호는 이름 순서로 정렬
+    return int(match.group(1)), match.group(0)
+
+
+def scan_category(path):
+    """
+    Options of a category directory (01.apt.docker, 03.extra의 01.debug.docker...)
+    Files not named '<order>.<title>.docker' are ignored.
+    Orders are compared as numbers, so '1.x.docker' and '01.y.docker' are SubOptions of
+    the same option (whose order is the first one, '01').
+
+    :return: tuple(OptionEntry) sorted by order, SubOptions sorted by title
+    """
+    matches = []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            match = RE_SUB_OPTION.match(entry.name)
+            if match and entry.is_file():
+                matches.append(match)
+    options = {}
+    for match in sorted(matches, key=_sort_key):
+        order, sub_options = options.setdefault(int(match.group(1)), (match.group(1), []))
+        sub_options.append(SubOptionEntry(match.group(1), match.group(2), match.group(0)))
+    return tuple(OptionEntry(order, tuple(sub_options))
+                 for order, sub_options in options.values())
+
+
+class DockerOptionIndex:
+    """
+    Sorted, immutable index of the categories, options and SubOptions of a config/docker tree
+    The scan is cached in ~/.django-setting/docker-index/ and reused while the mtimes of the
+    tree directories are unchanged (a file added, removed or renamed changes its directory).
+    Only the caches of the CACHE_KEEP most recently used trees are kept.
+
+    config/docker 디렉토리의 카테고리, 옵션, 서브옵션 목록 (디렉토리 mtime이 같으면 cache 사용)
+    """
+
+    def __init__(self, categories):
+        self.categories = tuple(categories)
+        self._categories = {category.title: category for category in self.categories}
+        self._options = {(category.title, get_order_key(option.order)): option
+                         for category in self.categories for option in category.options}
+        self._sub_options = {
+            (category.title, get_order_key(option.order), sub_option.title): sub_option
+            for category in self.categories for option in category.options
+            for sub_option in option.sub_options
+        }
+
+    @classmethod
+    def scan(cls, conf_dir):
+        matches = []
+        with os.scandir(conf_dir) as entries:
+            for entry in entries:
+                match = RE_CATEGORY.match(entry.name)
+                if match and entry.is_dir():
+                    matches.append(match)
+        return cls(
+            CategoryEntry(match.group(1), match.group(2), match.group(0),
+                          scan_category(os.path.join(conf_dir, match.group(0))))
+            for match in sorted(matches, key=_sort_key)
+        )
+
+    @classmethod
+    def load(cls, conf_dir, cache_dir=None, keep=CACHE_KEEP):
+        """
+        :param conf_dir: config/docker directory
+        :param cache_dir: default ~/.django-setting/docker-index
+        :param keep: number of cache files kept in 'cache_dir'
+        :return: DockerOptionIndex
+        """
+        conf_dir = os.path.abspath(conf_dir)
+        cache_dir = cache_dir or os.path.join(get_cache_dir(), 'docker-index')
+        cache_file = os.path.join(cache_dir, '%s.json' % hashlib.sha256(
+            conf_dir.encode('utf-8')).hexdigest()[:16])
+        try:
+            cache = json.loads(open(cache_file).read())
+        except (OSError, ValueError):
+            cache = None
+        if (cache and cache.get('version') == INDEX_VERSION and
+                cache['mtimes'] == cls._get_mtimes(conf_dir, cache['mtimes'])):
+            # 최근 사용 시각을 갱신해 evict대상에서 제외
+            try:
+                os.utime(cache_file)
+            except OSError:
+                pass
+            return cls.from_data(cache['categories'])
+
+        index = cls.scan(conf_dir)
+        mtimes = [[name, cls._get_mtime(os.path.join(conf_dir, name))]
+                  for name in ('',) + tuple(category.name for category in index.categories)]
+        atomic_write(cache_file, json.dumps({
+            'version': INDEX_VERSION,
+            'mtimes': mtimes,
+            'categories': index.to_data(),
+        }))
+        cls.evict(cache_dir, keep)
+        return index
+
+    @staticmethod
+    def evict(cache_dir, keep=CACHE_KEEP):
+        """
+        Remove all but the 'keep' most recently used cache files
+
+        :return: list of removed cache file names
+        """
+        entries = []
+        for name in os.listdir(cache_dir):
+            if name.endswith('.json'):
+                try:
+                    entries.append((os.path.getmtime(os.path.join(cache_dir, name)), name))
+                except OSError:
+                    continue
+        entries.sort(reverse=True)
+        removed = []
+        for _, name in entries[keep:]:
+            try:
+                os.remove(os.path.join(cache_dir, name))
+            except OSError:
+                # 다른 프로세스가 먼저 지운 경우
+                continue
+            removed.append(name)
+        return removed
+
+    @staticmethod
+    def _get_mtime(path):
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    @classmethod
+    def _get_mtimes(cls, conf_dir, recorded):
+        return [[name, cls._get_mtime(os.path.join(conf_dir, name))] for name, mtime in recorded]
+
+    def to_data(self):
+        return [[category.order, category.title, category.name,
+                 [[option.order, [list(sub_option) for sub_option in option.sub_options]]
+                  for option in category.options]]
+                for category in self.categories]
+
+    @classmethod
+    def from_data(cls, data):
+        return cls(
+            CategoryEntry(order, title, name, tuple(
+                OptionEntry(option_order, tuple(
+                    SubOptionEntry(*sub_option) for sub_option in sub_options))
+                for option_order, sub_options in options))
+            for order, title, name, options in data
+        )
+
+    def get_category(self, title):
+        return self._categories.get(title)
+
+    def get_option(self, category_title, order):
+        return self._options.get((category_title, get_order_key(order)))
+
+    def get_sub_option(self, category_title, order, title):
+        return self._sub_options.get((category_title, get_order_key(order), title))
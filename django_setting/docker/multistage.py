@@ -0,0 +1,71 @@
+import re
+
+__all__ = (
+    'MULTI_STAGE_FILE_NAME',
+    'add_cache_mounts',
+    'render_multi_stage',
+)
+
+MULTI_STAGE_FILE_NAME = 'Dockerfile.multistage'
+SYNTAX_LINE = '# syntax=docker/dockerfile:1'
+# BuildKit cache mount (빌드 사이에 유지되는 apt, pip 다운로드 cache)
+APT_MOUNTS = '--mount=type=cache,target=/var/cache/apt,sharing=locked ' \
+             '--mount=type=cache,target=/var/lib/apt,sharing=locked'
+PIP_MOUNTS = '--mount=type=cache,target=/root/.cache/pip'
+# ubuntu 이미지는 apt-get 실행 후 다운로드한 패키지를 지우므로 cache mount를 쓰려면 설정 제거
+APT_KEEP_CACHE = 'RUN         rm -f /etc/apt/apt.conf.d/docker-clean; ' \
+                 'echo \'Binary::apt::APT::Keep-Downloaded-Packages "true";\' ' \
+                 '> /etc/apt/apt.conf.d/keep-cache'
+
+RE_RUN = re.compile(r'^(RUN\s+)(?!\[|--mount)(.*)$', re.IGNORECASE)
+
+
+def add_cache_mounts(content):
+    """
+    Add BuildKit cache mounts to the RUN lines using apt-get or pip install
+
+    apt-get, pip install을 실행하는 RUN 명령어에 cache mount 추가
+    :param content: Dockerfile text
+    :return: (Dockerfile text, True if an apt cache mount was added)
+    """
+    lines = []
+    uses_apt = False
+    for line in content.splitlines():
+        match = RE_RUN.match(line)
+        if match:
+            mounts = []
+            if 'apt-get' in match.group(2):
+                mounts.append(APT_MOUNTS)
+                uses_apt = True
+            if 'pip install' in match.group(2):
+                mounts.append(PIP_MOUNTS)
+            if mounts:
+                line = '{}{} {}'.format(match.group(1), ' '.join(mounts), match.group(2))
+        lines.append(line)
+    return '\n'.join(lines), uses_apt
+
+
+def render_multi_stage(template, stages, maintainer):
+    """
+    Render the stages as one multi-stage Dockerfile
+    Each stage is named after its image and starts FROM its parent stage
+    (or an existing image for the first stages).
+
+    여러 stage로 이루어진 Dockerfile 하나를 생성
+    :param template: content of template.docker
+    :param stages: list of (stage name, FROM image or stage, Dockerfile content),
+                   parents before their children
+    :param maintainer: maintainer of the images
+    :return: Dockerfile text
+    """
+    rendered = [SYNTAX_LINE]
+    for name, from_image, content in stages:
+        content, uses_apt = add_cache_mounts(content)
+        if uses_apt:
+            content = '{}\n{}'.format(APT_KEEP_CACHE, content)
+        rendered.append(template.format(
+            from_image='{} AS {}'.format(from_image, name),
+            maintainer=maintainer,
+            content=content.rstrip('\n'),
+        ))
+    return '\n\n'.join(rendered) + '\n'
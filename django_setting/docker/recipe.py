@@ -0,0 +1,143 @@
+from .index import get_order_key
+from ..utils import *
+
+__all__ = (
+    'RecipeError',
+    'Recipe',
+)
+
+
+class RecipeError(Exception):
+    pass
+
+
+class Recipe:
+    """
+    Selections for the DockerBuild prompts, read from a recipe file and/or command line flags
+    Flags take precedence over the file.
+
+    ex) recipe.yaml
+        options:
+          extra.01: [debug, deploy]     # '<category title>.<option order>': SubOption title(s)
+        start: greenwrap-base-02-pip    # image name or number of the start image (0: root image)
+        end: greenwrap-extra-01-debug   # image name or number of the end image (default: last)
+        jobs: 2
+        multi_stage: false
+        force: false
+
+    ex) flags
+        --option extra.01=debug,deploy --start 3 --end greenwrap-extra-01-debug
+
+    DockerBuild의 선택값을 recipe 파일, 명령어 옵션에서 읽어옴
+    """
+    KEYS = ('options', 'start', 'end', 'jobs', 'multi_stage', 'force')
+
+    def __init__(self, values=None):
+        self.options = {}
+        self.start = None
+        self.end = None
+        self.jobs = None
+        self.multi_stage = False
+        self.force = False
+        if values:
+            self.update(values)
+
+    @classmethod
+    def from_sources(cls, recipe_file=None, options=(), start=None, end=None):
+        """
+        :param recipe_file: YAML/JSON recipe file
+        :param options: list of '<category title>.<option order>=<title>[,<title>...]'
+        :param start: start image (name or number)
+        :param end: end image (name or number)
+        :return: Recipe
+        """
+        recipe = cls()
+        if recipe_file:
+            errors = (OSError, ValueError, ImportError)
+            if recipe_file.endswith(('.yaml', '.yml')):
+                try:
+                    import yaml
+                    errors += (yaml.YAMLError,)
+                except ImportError:
+                    pass
+            try:
+                values = load_data_file(recipe_file)
+            except errors as e:
+                raise RecipeError('%s: %s' % (recipe_file, e))
+            if values is None:
+                values = {}
+            if not isinstance(values, dict):
+                raise RecipeError('%s: a recipe must be a mapping' % recipe_file)
+            try:
+                recipe.update(values)
+            except RecipeError as e:
+                raise RecipeError('%s: %s' % (recipe_file, e))
+        for option in options:
+            key, separator, titles = option.partition('=')
+            if not separator or not titles:
+                raise RecipeError('Invalid option "%s" (ex: extra.01=debug,deploy)' % option)
+            recipe.set_option(key, titles)
+        if start is not None:
+            recipe.start = start
+        if end is not None:
+            recipe.end = end
+        return recipe
+
+    def update(self, values):
+        unknown = set(values) - set(self.KEYS)
+        if unknown:
+            raise RecipeError('Unknown recipe keys: %s' % ', '.join(sorted(unknown)))
+        options = values.get('options') or {}
+        if not isinstance(options, dict):
+            raise RecipeError('options must be a mapping (ex: extra.01: [debug, deploy])')
+        for key, titles in options.items():
+            self.set_option(key, titles)
+        for key in self.KEYS[1:]:
+            if key in values:
+                setattr(self, key, self.check_type(key, values[key]))
+
+    @staticmethod
+    def check_type(key, value):
+        if value is None:
+            return value
+        if key == 'jobs':
+            # bool은 int의 하위 클래스이므로 제외
+            if not isinstance(value, int) or isinstance(value, bool) or value < 1:
+                raise RecipeError('jobs must be a positive integer, got %r' % (value,))
+        elif key in ('multi_stage', 'force'):
+            if not isinstance(value, bool):
+                raise RecipeError('%s must be true or false, got %r' % (key, value))
+        elif not isinstance(value, (int, str)) or isinstance(value, bool):
+            # start, end: image name or number
+            raise RecipeError('%s must be an image name or number, got %r' % (key, value))
+        return value
+
+    def set_option(self, key, titles):
+        """
+        :param key: '<category title>.<option order>' (ex: extra.01)
+        :param titles: SubOption title, comma separated titles or a list of titles
+        """
+        category, separator, order = str(key).rpartition('.')
+        if not separator or not category:
+            raise RecipeError('Invalid option key "%s" (ex: extra.01)' % key)
+        if isinstance(titles, str):
+            titles = titles.split(',')
+        elif not isinstance(titles, list):
+            raise RecipeError('%s: expected a SubOption title or a list of titles' % key)
+        self.options[(category, order)] = [str(title).strip() for title in titles]
+
+    def get_option(self, option):
+        """
+        :param option: DockerCategoryOption
+        :return: list of selected SubOption titles, None if not in the recipe
+        """
+        # recipe의 'extra.1'과 'extra.01'은 같은 옵션
+        for (category, order), titles in self.options.items():
+            if (category == option.category.title and
+                    get_order_key(order) == get_order_key(option.order)):
+                return titles
+        return None
+
+    @property
+    def is_empty(self):
+        return not self.options and self.start is None and self.end is None
@@ -1,8 +1,8 @@
 import os
 import shutil
-import subprocess
 import sys
-from distutils.util import strtobool
+
+from ..utils import *
 
 
 class RemoveProject:
@@ -25,6 +25,8 @@ class RemoveProject:
             ))
         if not strtobool(ask):
             sys.exit()
-        shutil.rmtree(self.project_name)
-        subprocess.call('pyenv uninstall -f %s' % self.env_name, shell=True)
+        with print_cmd_step('Remove project directory'):
+            shutil.rmtree(self.project_name)
+        with print_cmd_step('Uninstall virtualenv'):
+            runner.run_sync('pyenv uninstall -f %s' % self.env_name)
         print('Remove project %s complete' % self.project_name)
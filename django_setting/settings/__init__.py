@@ -1,12 +1,34 @@
-import json
 import os
-import shutil
-import subprocess
+
+from .answers import *
+from .schema import *
+from ..utils import *
+
+__all__ = (
+    'SettingsBuild',
+    'MissingAnswerError',
+)
+
+
+class MissingAnswerError(Exception):
+    pass
 
 
 class SettingsBuild:
-    def __init__(self, project_name):
-        self.mode = 'debug'
+    def __init__(self, project_name, answers=None, mode=None, interactive=True, force=False):
+        """
+        :param answers: Answers used instead of prompting, only missing keys are prompted
+        :param mode: 'debug' or 'deploy', selected from the answers or a prompt if not given
+        :param interactive: False to raise MissingAnswerError instead of prompting
+        :param force: overwrite the config files edited in the project
+        """
+        self.mode = mode or 'debug'
+        self.answers = answers or Answers()
+        self.interactive = interactive
+        self._select_mode = mode is None
+        self.force = force
+        # input_key에서 값이 추가된 설정 layer 이름 (기록 전 검증에서 메모리의 내용으로 hash)
+        self.edited_layers = set()
 
         self.CWD = os.getcwd()
         self.PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -32,12 +54,9 @@ class SettingsBuild:
         self.CONFIG_SECRET_DEBUG_FILE = os.path.join(self.CONFIG_SECRET_DIR, 'settings_debug.json')
         self.CONFIG_SECRET_DEPLOY_FILE = os.path.join(self.CONFIG_SECRET_DIR,
                                                       'settings_deploy.json')
-        self.make_and_copy_config_files()
 
-        self.CONFIG_PUBLIC = json.loads(open(self.CONFIG_PUBLIC_FILE).read())
-        self.CONFIG_SECRET_COMMON = json.loads(open(self.CONFIG_SECRET_COMMON_FILE).read())
-        self.CONFIG_SECRET_DEBUG = json.loads(open(self.CONFIG_SECRET_DEBUG_FILE).read())
-        self.CONFIG_SECRET_DEPLOY = json.loads(open(self.CONFIG_SECRET_DEPLOY_FILE).read())
+        # 설정파일은 처음 사용할 때 읽음
+        self.config = ConfigResolver(self.PROJECT_DIR)
 
         # Django paths
         self.DJANGO_DIR = os.path.join(self.PROJECT_DIR, 'django_app')
@@ -47,30 +66,46 @@ class SettingsBuild:
     def execute(self, rebuild=False):
         # Settings build variables
         self.print_intro()
-        self.make_and_copy_config_files()
-        # self.select_mode()
-        # self.input_key(rebuild)
-        # self.write_dict_to_file()
-        # self.encrypt_secret()
+        with print_cmd_step('Copy config files'):
+            result = self.make_and_copy_config_files()
+            print_cmd_step_detail(result)
+            for path in result.kept:
+                print_cmd_step_detail('kept edited file: %s (use --force to overwrite)' % path)
+        if self._select_mode:
+            self.select_mode()
+        self.input_key(rebuild)
+        # 잘못된 값이 파일에 기록되지 않도록 기록 전에 검증
+        with print_cmd_step('Validate config files'):
+            validate_layers(self.config, modified=self.edited_layers)
+        with print_cmd_step('Write config files'):
+            self.write_dict_to_file()
         print()
 
     def make_and_copy_config_files(self):
-        shutil.rmtree(self.PROJECT_DIR, '.config')
-        shutil.copytree(
+        """
+        Sync the package config files into the project .config directory
+        (only added or changed files are copied, files edited in the project are kept)
+        :return: SyncResult
+        """
+        result = sync_tree(
             os.path.join(self.PACKAGE_FILE_DIR, 'config'),
-            os.path.join(self.PROJECT_DIR, '.config'),
+            self.CONFIG_DIR,
+            force=self.force,
+            # public 설정은 write_dict_to_file에서 기록하므로 처음에만 복사
+            seed_only=(os.path.basename(self.CONFIG_PUBLIC_FILE),),
         )
-        # shutil.move(os.path.join(self.PACKAGE_FILE_DIR, 'config'), self.CONFIG_DIR)
-        if not os.path.exists(self.CONFIG_SECRET_DIR):
-            os.makedirs(self.CONFIG_SECRET_DIR)
-        if not os.path.exists(self.CONFIG_SECRET_COMMON_FILE):
-            open(self.CONFIG_SECRET_COMMON_FILE, 'wt').write('{}')
-        if not os.path.exists(self.CONFIG_SECRET_DEBUG_FILE):
-            open(self.CONFIG_SECRET_DEBUG_FILE, 'wt').write('{}')
-        if not os.path.exists(self.CONFIG_SECRET_DEPLOY_FILE):
-            open(self.CONFIG_SECRET_DEPLOY_FILE, 'wt').write('{}')
+        for path in (self.CONFIG_SECRET_COMMON_FILE, self.CONFIG_SECRET_DEBUG_FILE,
+                     self.CONFIG_SECRET_DEPLOY_FILE):
+            if not os.path.exists(path):
+                atomic_write(path, '{}')
+        return result
 
     def input_key(self, rebuild):
+        config_public = self.config.public
+        config_secret_common = self.config.common
+        config_secret_debug = self.config.layer('debug').data
+        config_secret_deploy = self.config.layer('deploy').data
+
         # Public config - docker
         self.dict_key_make(config_public, 'docker')
         self.input_dict_value(
@@ -156,7 +191,7 @@ class SettingsBuild:
             default='postgresql_psycopg2',
         )
         if 'sqlite3' in db_engine:
-            sqlite_db_name = os.path.join(BASE_DIR, 'db.sqlite3')
+            sqlite_db_name = os.path.join(self.DJANGO_DIR, 'db.sqlite3')
             self.input_dict_value(
                 msg='[Debug] DB Name (default: %s)' % sqlite_db_name,
                 dic=config_secret_debug['django']['databases']['default'],
@@ -168,7 +203,7 @@ class SettingsBuild:
                 msg='[Debug] DB Name (default: %s)' % config_public['common']['defaultDBName'],
                 dic=config_secret_debug['django']['databases']['default'],
                 key='NAME',
-                default='api-ios',
+                default=config_public['common']['defaultDBName'],
             )
             self.input_dict_value(
                 msg='[Debug] DB Host (default: localhost)',
@@ -194,6 +229,13 @@ class SettingsBuild:
             )
 
         if self.mode == 'deploy':
+            # Deploy secret config - Django (DEBUG=False이므로 비어있으면 모든 요청이 400)
+            self.dict_key_make(config_secret_deploy, 'django')
+            self.input_dict_value(
+                msg='[Deploy] Django allowed hosts (comma separated, ex: example.com,.example.com)',
+                dic=config_secret_deploy['django'],
+                key='allowed_hosts',
+            )
             # Deploy secret config - Databases
             self.dict_key_make(config_secret_deploy['django'], 'databases')
             self.dict_key_make(config_secret_deploy['django']['databases'], 'default')
@@ -254,20 +296,21 @@ class SettingsBuild:
                 key='s3_region_name',
             )
 
-    @staticmethod
-    def write_dict_to_file():
-        with open(CONF_SECRET_COMMON_FILE, 'wt') as f:
-            f.write(json.dumps(config_secret_common, indent=4, sort_keys=True))
-        with open(CONF_SECRET_DEBUG_FILE, 'wt') as f:
-            f.write(json.dumps(config_secret_debug, indent=4, sort_keys=True))
-
-    @staticmethod
-    def encrypt_secret():
-        encrypt_command = 'tar cvf secrets.tar .conf_secret &&' \
-                          'travis encrypt-file secrets.tar --add &&' \
-                          'git add secrets.tar.enc .travis.yml'
-        subprocess.run(encrypt_command, shell=True)
-        print(' encrypt secret config')
+    def write_dict_to_file(self):
+        """
+        Write the changed config layers (unchanged files are not touched)
+        :return: list of written files
+        """
+        written = []
+        for name in ('public', 'common') + CONFIG_MODES:
+            layer = self.config.layer(name)
+            if layer.save():
+                print_cmd_step_detail(os.path.relpath(layer.path, self.PROJECT_DIR))
+                written.append(layer.path)
+        if not written:
+            print_cmd_step_detail('no changes')
+        self.config.invalidate()
+        return written
 
     @staticmethod
     def print_intro():
@@ -275,6 +318,12 @@ class SettingsBuild:
         print(intro_string)
 
     def select_mode(self):
+        mode = self.answers.get('mode')
+        if mode in CONFIG_MODES:
+            self.mode = mode
+            return
+        if not self.interactive:
+            return
         print(' Select setting mode (default: 1.Debug)')
         print('  1.Debug')
         print('  2.Deploy')
@@ -284,8 +333,7 @@ class SettingsBuild:
         else:
             self.mode = 'debug'
 
-    @staticmethod
-    def dict_key_make(dic, key):
+    def dict_key_make(self, dic, key):
         """
         dic에 key에 해당하는 dict가 없을 경우 생성해줌
         :param dic: dict
@@ -294,23 +342,92 @@ class SettingsBuild:
         """
         if not dic.get(key):
             dic[key] = {}
+            self.mark_edited(dic, key)
+
+    def mark_edited(self, dic, key):
+        """
+        Record the config layer containing 'dic' as changed in memory
+        (every layer if 'dic' is not found in one)
+        """
+        path = self.get_answer_path(dic, key)
+        if path:
+            self.edited_layers.add(path[0])
+        else:
+            self.edited_layers.update(('public', 'common') + CONFIG_MODES)
+
+    def get_answer_path(self, dic, key):
+        """
+        Returns the path of 'key' of 'dic' from the config layer containing 'dic'
+        ex) ('common', 'django', 'default_superuser', 'username')
+
+        dic이 포함된 설정 layer에서 key까지의 경로를 반환
+        """
+        def find(cur, path):
+            if cur is dic:
+                return path
+            for cur_key, value in cur.items():
+                if isinstance(value, dict):
+                    found = find(value, path + (cur_key,))
+                    if found is not None:
+                        return found
+            return None
+
+        for name in ('public', 'common') + CONFIG_MODES:
+            path = find(self.config.layer(name).data, (name,))
+            if path is not None:
+                return path + (key,)
+        return None
 
     @staticmethod
-    def input_dict_value(msg, dic, key, base='', default=None):
+    def add_base(value, base):
+        """
+        base가 붙지 않은 문자열 값에 base를 붙여줌 (ex: sqlite3 -> django.db.backends.sqlite3)
+        """
+        if base and value and isinstance(value, str) and not value.startswith(base):
+            return base + value
+        return value
+
+    @staticmethod
+    def is_empty_value(dic, key):
+        # False, 0도 입력된 값이므로 None과 빈 문자열만 비어있는 값으로 취급
+        value = dic.get(key)
+        return value is None or (isinstance(value, str) and value.strip() == '')
+
+    def input_dict_value(self, msg, dic, key, base='', default=None):
         """
         아래의 조건동안 dic으로 전달된 dict에 넣을 값을 입력받는다
         매 입력마다 msg의 값을 출력해준다
             1. 해당 키 값이 없거나
             2. 키의 타입이 str이며 양쪽 여백을 없앤 결과(.strip())가 공백인 경우
+        answers에 값이 있으면 입력받지 않고 사용한다
         :param msg: 어떤 키에 값을 넣을것인지 메시지 출력
         :param dic: 실제로 값을 기록할 dict
         :param key: dict에서 값을 기록할 key
         :param default: 입력되지 않을 경우 기본적으로 넣을 값
         :return: 입력된 값
         """
-        while not dic.get(key) or (isinstance(dic[key], str) and dic[key].strip() == ''):
-            value = base + input('{}: '.format(msg)).strip()
-            dic[key] = value
-            if default and value == '':
-                dic[key] = default
+        if self.is_empty_value(dic, key):
+            self.mark_edited(dic, key)
+        if self.is_empty_value(dic, key) and self.answers:
+            path = self.get_answer_path(dic, key)
+            value = self.answers.get(*path) if path else None
+            if value is not None:
+                dic[key] = self.add_base(value, base)
+        if self.is_empty_value(dic, key) and not self.interactive:
+            if default is None:
+                raise MissingAnswerError('No answer for %s (%s)' % (
+                    '.'.join(self.get_answer_path(dic, key) or (key,)), msg))
+            dic[key] = self.add_base(default, base)
+            return dic[key]
+        while self.is_empty_value(dic, key):
+            value = input('{}: '.format(msg)).strip()
+            if default is not None and value == '':
+                # 입력하지 않으면 기본값 사용 (기본값이 ''인 경우도 포함)
+                dic[key] = self.add_base(default, base)
+                break
+            dic[key] = self.add_base(value, base)
+        # 목록 값 (allowed_hosts)은 쉼표로 구분된 입력을 list로 변환
+        if key == 'allowed_hosts' and isinstance(dic[key], str):
+            self.mark_edited(dic, key)
+            dic[key] = [host.strip() for host in dic[key].split(',') if host.strip()]
         return dic[key]
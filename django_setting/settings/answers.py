@@ -0,0 +1,103 @@
+import json
+import os
+
+from ..utils import *
+
+__all__ = (
+    'DEFAULT_ENV_PREFIX',
+    'Answers',
+)
+
+DEFAULT_ENV_PREFIX = 'DJANGO_SETTING_'
+# 같은 prefix를 쓰지만 답변이 아닌 django_setting의 설정 환경변수
+RESERVED_ENV_NAMES = (
+    'DJANGO_SETTING_HOME',
+    'DJANGO_SETTING_JOBS',
+)
+
+
+class Answers:
+    """
+    Values for the SettingsBuild prompts, read from an answer file and/or environment variables
+    Keys are compared case-insensitively, environment variables take precedence over the file.
+
+    ex) answers.yaml
+        mode: deploy
+        public:
+          docker:
+            DockerfileBaseName: greenwrap
+        common:
+          github:
+            username: lhy
+        deploy:
+          django:
+            databases:
+              default:
+                HOST: db.example.com
+
+    ex) environment variables (prefix 'DJANGO_SETTING_', '__' separates the keys)
+        DJANGO_SETTING_MODE=deploy
+        DJANGO_SETTING_COMMON__GITHUB__USERNAME=lhy
+        DJANGO_SETTING_DEBUG__DJANGO__ALLOWED_HOSTS='["localhost"]'  (JSON values are decoded)
+        DJANGO_SETTING_HOME and DJANGO_SETTING_JOBS configure django_setting and are not answers.
+
+    SettingsBuild의 입력값을 답변파일, 환경변수에서 읽어옴
+    """
+
+    def __init__(self, values=None):
+        self.values = {}
+        if values:
+            self.update(values)
+
+    @classmethod
+    def from_sources(cls, answers_file=None, env_prefix=None, environ=None):
+        """
+        :param answers_file: YAML/JSON answer file
+        :param env_prefix: prefix of the environment variables to read, None to skip them
+        :param environ: environment mapping, default os.environ
+        :return: Answers
+        """
+        answers = cls()
+        if answers_file:
+            answers.update(load_data_file(answers_file) or {})
+        if env_prefix:
+            answers.update_from_environ(env_prefix, os.environ if environ is None else environ)
+        return answers
+
+    def update(self, values, path=()):
+        """
+        Flatten nested dict 'values' into {(key, ...): value}
+        """
+        for key, value in values.items():
+            cur_path = path + (str(key).lower(),)
+            if isinstance(value, dict):
+                self.update(value, cur_path)
+            else:
+                self.values[cur_path] = value
+
+    def update_from_environ(self, prefix, environ):
+        prefix = prefix.upper()
+        for name, value in environ.items():
+            if not name.upper().startswith(prefix) or name == prefix:
+                continue
+            if name.upper() in RESERVED_ENV_NAMES:
+                continue
+            path = tuple(key.lower() for key in name[len(prefix):].split('__'))
+            try:
+                value = json.loads(value)
+            except ValueError:
+                pass
+            # JSON으로 해석된 숫자 등은 문자열로 (list, bool은 그대로 사용)
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                value = str(environ[name])
+            self.values[path] = value
+
+    def get(self, *path):
+        """
+        :param path: keys from the layer name, ex) get('common', 'github', 'username')
+        :return: answer, None if not given
+        """
+        return self.values.get(tuple(str(key).lower() for key in path))
+
+    def __bool__(self):
+        return bool(self.values)
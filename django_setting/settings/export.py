@@ -0,0 +1,101 @@
+import json
+import os
+
+from ..utils import *
+
+__all__ = (
+    'CONFIG_SOURCE_ENV',
+    'ENV_PREFIX',
+    'EXPORT_FORMATS',
+    'encode_env_value',
+    'flatten_config',
+    'format_env_file',
+    'format_supervisor',
+    'export_env',
+)
+
+# codes/settings/config_loader의 load_env_config와 같은 이름 규칙
+CONFIG_SOURCE_ENV = 'DJANGO_CONFIG_SOURCE'
+ENV_PREFIX = 'DJANGO_CONFIG__'
+EXPORT_FORMATS = ('env', 'supervisor')
+
+
+def encode_env_value(value):
+    """
+    Strings are written as they are unless they would be read back as another type
+    (ex: '5432' -> '"5432"'), other values as JSON
+    """
+    if isinstance(value, str):
+        try:
+            json.loads(value)
+        except ValueError:
+            return value
+    return json.dumps(value, separators=(',', ':'))
+
+
+def flatten_config(config, prefix=ENV_PREFIX):
+    """
+    Flatten the resolved config into environment variables, keys joined with '__'
+    ex) {'secret': {'django': {'secret_key': 'x'}}} -> {'DJANGO_CONFIG__secret__django__secret_key': 'x'}
+    Key case is kept so the config can be rebuilt as it was.
+
+    :return: dict of variable name: value (str)
+    """
+    variables = {}
+
+    def flatten(value, path):
+        if isinstance(value, dict) and value:
+            for key, sub_value in value.items():
+                if '__' in key or not key:
+                    raise ValueError('Config key %r can not be exported' % key)
+                flatten(sub_value, path + (key,))
+        else:
+            variables[prefix + '__'.join(path)] = encode_env_value(value)
+
+    flatten(config, ())
+    return variables
+
+
+def format_env_file(variables):
+    """
+    KEY=value lines (docker --env-file, systemd EnvironmentFile)
+    """
+    lines = []
+    for name, value in sorted(variables.items()):
+        if '\n' in value:
+            raise ValueError('%s contains a newline, which an env file can not hold' % name)
+        lines.append('%s=%s' % (name, value))
+    return '\n'.join(lines) + '\n'
+
+
+def format_supervisor(variables):
+    """
+    supervisor [program:x] 'environment=' line
+    """
+    entries = []
+    for name, value in sorted(variables.items()):
+        # supervisor는 %(...)s를 치환하므로 %를 %%로
+        value = value.replace('\\', '\\\\').replace('"', '\\"').replace('%', '%%')
+        entries.append('%s="%s"' % (name, value))
+    return 'environment=%s\n' % ','.join(entries)
+
+
+def export_env(project_dir, mode, fmt='env', output=None):
+    """
+    Export the resolved config of 'mode' as environment variables
+    (with DJANGO_CONFIG_SOURCE=env, the generated settings read them instead of the config files)
+
+    :param fmt: 'env' or 'supervisor'
+    :param output: file written with permission 0600, None to only return the content
+    :return: content
+    """
+    config = ConfigResolver(project_dir).resolve(mode)
+    variables = flatten_config(config)
+    variables[CONFIG_SOURCE_ENV] = 'env'
+    if fmt == 'supervisor':
+        content = format_supervisor(variables)
+    else:
+        content = format_env_file(variables)
+    if output:
+        atomic_write(output, content, permissions=0o600)
+    return content
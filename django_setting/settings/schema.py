@@ -0,0 +1,225 @@
+import hashlib
+import json
+import os
+
+from ..utils import *
+
+__all__ = (
+    'Optional',
+    'SCHEMAS',
+    'DOCKER_REQUIRED',
+    'SchemaError',
+    'validate_value',
+    'validate_layers',
+)
+
+
+class Optional:
+    """
+    Marks a dict key of a schema as optional (ex: {Optional('docker'): {...}})
+    """
+
+    def __init__(self, key):
+        self.key = key
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __eq__(self, other):
+        return isinstance(other, Optional) and other.key == self.key
+
+    def __repr__(self):
+        return 'Optional(%r)' % self.key
+
+
+# schema: type, (type, ...), [item schema], {key 또는 Optional(key): schema}
+# dict에 schema에 없는 key가 있어도 허용
+DATABASE_SCHEMA = {
+    'ENGINE': str,
+    'NAME': str,
+    Optional('HOST'): str,
+    Optional('PORT'): (str, int),
+    Optional('USER'): str,
+    Optional('PASSWORD'): str,
+}
+DJANGO_MODE_SCHEMA = {
+    Optional('allowed_hosts'): [str],
+    Optional('databases'): {
+        'default': DATABASE_SCHEMA,
+    },
+}
+SCHEMAS = {
+    'public': {
+        'docker': {
+            'DockerfileBaseName': str,
+            'rootImageName': str,
+            'dockerHubImageName': str,
+        },
+        'common': {
+            'appName': str,
+            'defaultDBName': str,
+        },
+    },
+    'common': {
+        'django': {
+            'secret_key': str,
+            Optional('default_superuser'): {
+                'username': str,
+                'password': str,
+                Optional('email'): str,
+            },
+        },
+        Optional('docker'): {
+            'maintainer': str,
+        },
+        Optional('github'): {
+            'username': str,
+            'password': str,
+        },
+    },
+    'debug': {
+        Optional('django'): DJANGO_MODE_SCHEMA,
+    },
+    'deploy': {
+        Optional('django'): DJANGO_MODE_SCHEMA,
+        Optional('aws'): {
+            'access_key_id': str,
+            'secret_access_key': str,
+            's3_bucket_name': str,
+            's3_region_name': str,
+        },
+    },
+}
+# DockerBuild가 사용하는 값 (schema에서는 optional인 값 포함)
+DOCKER_REQUIRED = (
+    'public.docker.DockerfileBaseName',
+    'public.docker.rootImageName',
+    'public.docker.dockerHubImageName',
+    'common.docker.maintainer',
+)
+# schema가 바뀌면 이전 검증 결과 cache를 사용하지 않도록 schema 자체를 cache key에 포함
+SCHEMA_HASH = hashlib.sha256(repr(sorted(
+    (name, repr(schema)) for name, schema in SCHEMAS.items())).encode('utf-8')).hexdigest()
+CACHE_SIZE = 256
+
+
+class SchemaError(Exception):
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__('Invalid config:\n%s' % '\n'.join('  %s' % e for e in errors))
+
+
+def _type_name(types):
+    if isinstance(types, tuple):
+        return ' or '.join(t.__name__ for t in types)
+    return types.__name__
+
+
+def validate_value(value, schema, path):
+    """
+    :param value: value to validate
+    :param schema: schema of the value
+    :param path: path of the value for the error messages (ex: 'common.docker')
+    :return: list of error messages
+    """
+    if isinstance(schema, dict):
+        if not isinstance(value, dict):
+            return ['%s: expected an object, got %s' % (path, type(value).__name__)]
+        errors = []
+        for key, sub_schema in schema.items():
+            name = key.key if isinstance(key, Optional) else key
+            if name not in value:
+                if not isinstance(key, Optional):
+                    errors.append('%s.%s: missing' % (path, name))
+                continue
+            errors.extend(validate_value(value[name], sub_schema, '%s.%s' % (path, name)))
+        return errors
+    if isinstance(schema, list):
+        if not isinstance(value, list):
+            return ['%s: expected a list, got %s' % (path, type(value).__name__)]
+        errors = []
+        for index, item in enumerate(value):
+            errors.extend(validate_value(item, schema[0], '%s[%d]' % (path, index)))
+        return errors
+    # bool은 int의 하위 클래스이므로 따로 확인
+    if not isinstance(value, schema) or (isinstance(value, bool) and schema is not bool):
+        return ['%s: expected %s, got %s' % (path, _type_name(schema), type(value).__name__)]
+    return []
+
+
+def _validate_required(layers, required):
+    errors = []
+    for path in required:
+        name, *keys = path.split('.')
+        value = layers[name]
+        for key in keys:
+            if not isinstance(value, dict) or key not in value:
+                errors.append('%s: missing' % path)
+                break
+            value = value[key]
+    return errors
+
+
+def _load_cache(cache_file):
+    try:
+        return json.loads(open(cache_file).read())
+    except (OSError, ValueError):
+        return []
+
+
+def validate_layers(resolver, names=('public', 'common') + CONFIG_MODES, required=(),
+                    cache_file=None, modified=()):
+    """
+    Validate the config layers of 'resolver' with SCHEMAS
+    The layers are validated as they are in memory, so values not written yet are checked.
+    Layers whose content hash already passed validation (with the same schema and
+    required paths) are not validated again.
+    The content hash of a layer is the file hash kept by ConfigLayer (a stat call when the
+    file did not change), layers changed in memory ('modified') are hashed from their content.
+
+    설정 layer들을 schema로 검증 (이미 검증된 내용의 파일은 다시 검증하지 않음)
+    :param resolver: ConfigResolver of the project
+    :param names: layer names to validate
+    :param required: extra required paths (ex: 'common.docker.maintainer')
+    :param cache_file: validation cache, default ~/.django-setting/schema-cache.json
+    :param modified: names of the layers whose data was changed since it was read
+    :return: list of validated layer names (the others were cached)
+    :raise SchemaError: with every error found
+    """
+    cache_file = cache_file or os.path.join(get_cache_dir(), 'schema-cache.json')
+    cached = set(_load_cache(cache_file))
+    validated = []
+    errors = []
+    new_keys = []
+    for name in names:
+        layer = resolver.layer(name)
+        layer_required = tuple(path for path in required if path.split('.')[0] == name)
+        if name in modified:
+            # 아직 파일에 기록되지 않은 값도 검증하도록 메모리의 내용으로 hash
+            content_hash = hashlib.sha256(layer.serialize()).hexdigest()
+        else:
+            # 파일이 바뀌지 않았으면 stat만 확인하고 읽을 때 계산된 hash를 사용
+            layer.refresh()
+            content_hash = layer.hash
+        key = '%s:%s:%s:%s' % (SCHEMA_HASH, name, content_hash, ','.join(layer_required))
+        key = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        if key in cached:
+            continue
+        data = layer.data
+        layer_errors = validate_value(data, SCHEMAS[name], name)
+        layer_errors.extend(_validate_required({name: data}, layer_required))
+        validated.append(name)
+        if layer_errors:
+            errors.extend(layer_errors)
+        else:
+            new_keys.append(key)
+    if new_keys:
+        # 다른 process가 그 사이에 추가한 key를 잃지 않도록 lock 안에서 다시 읽고 병합
+        with file_lock(cache_file + '.lock'):
+            cache = _load_cache(cache_file)
+            cache = [key for key in cache if key not in new_keys] + new_keys
+            # 최근 결과만 유지
+            atomic_write(cache_file, json.dumps(cache[-CACHE_SIZE:]))
+    if errors:
+        raise SchemaError(errors)
+    return validated
@@ -0,0 +1,238 @@
+import getpass
+import hashlib
+import os
+import shutil
+import struct
+import tarfile
+
+__all__ = (
+    'PASSPHRASE_ENV',
+    'SEALED_FILE_NAME',
+    'SealError',
+    'SealWriter',
+    'SealReader',
+    'get_passphrase',
+    'seal_secrets',
+    'unseal_secrets',
+)
+
+PASSPHRASE_ENV = 'DJANGO_CONFIG_PASSPHRASE'
+SEALED_FILE_NAME = 'secrets.sealed'
+
+# 파일 형식 (codes/settings/config_loader의 복호화 코드와 같아야 함)
+#   header: MAGIC, salt(16), scrypt log2(n), r, p, nonce prefix(7), chunk size(4)
+#   chunks: AES-256-GCM(plaintext chunk), nonce = prefix + counter(4) + final flag(1)
+#   header 전체를 각 chunk의 associated data로 사용
+MAGIC = b'DJSEAL01'
+HEADER_FORMAT = '>8s16sBBB7sI'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+TAG_SIZE = 16
+CHUNK_SIZE = 64 * 1024
+SCRYPT_LOG2_N, SCRYPT_R, SCRYPT_P = 15, 8, 1
+
+
+class SealError(Exception):
+    pass
+
+
+def get_aesgcm():
+    try:
+        from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+    except ImportError:
+        raise ImportError('cryptography is required to seal secrets (pip install cryptography)')
+    return AESGCM
+
+
+def derive_key(passphrase, salt, log2_n=SCRYPT_LOG2_N, r=SCRYPT_R, p=SCRYPT_P):
+    return hashlib.scrypt(passphrase.encode('utf-8'), salt=salt, n=2 ** log2_n, r=r, p=p,
+                          maxmem=256 * 1024 * 1024, dklen=32)
+
+
+def get_nonce(prefix, counter, final):
+    return prefix + struct.pack('>IB', counter, 1 if final else 0)
+
+
+def get_passphrase(confirm=False):
+    """
+    Returns the passphrase from the DJANGO_CONFIG_PASSPHRASE environment variable, or a prompt
+    """
+    passphrase = os.environ.get(PASSPHRASE_ENV)
+    if passphrase:
+        return passphrase
+    passphrase = getpass.getpass(' Passphrase: ')
+    if confirm and getpass.getpass(' Passphrase (again): ') != passphrase:
+        raise SealError('Passphrases do not match')
+    if not passphrase:
+        raise SealError('Empty passphrase')
+    return passphrase
+
+
+class SealWriter:
+    """
+    Writable file object encrypting everything written to it into 'fileobj'
+    in fixed-size authenticated chunks (memory use is one chunk)
+
+    쓰여진 데이터를 고정 크기 chunk단위로 암호화해 fileobj에 기록
+    """
+
+    def __init__(self, fileobj, passphrase, chunk_size=CHUNK_SIZE):
+        salt = os.urandom(16)
+        self.nonce_prefix = os.urandom(7)
+        self.header = struct.pack(HEADER_FORMAT, MAGIC, salt, SCRYPT_LOG2_N, SCRYPT_R,
+                                  SCRYPT_P, self.nonce_prefix, chunk_size)
+        self.aesgcm = get_aesgcm()(derive_key(passphrase, salt))
+        self.fileobj = fileobj
+        self.chunk_size = chunk_size
+        self.counter = 0
+        self.buffer = bytearray()
+        self.closed = False
+        self.fileobj.write(self.header)
+
+    def _write_chunk(self, data, final):
+        nonce = get_nonce(self.nonce_prefix, self.counter, final)
+        self.fileobj.write(self.aesgcm.encrypt(nonce, bytes(data), self.header))
+        self.counter += 1
+
+    def write(self, data):
+        self.buffer += data
+        # 마지막 chunk는 항상 chunk_size보다 작도록 꽉 찬 chunk만 먼저 기록
+        while len(self.buffer) > self.chunk_size:
+            self._write_chunk(self.buffer[:self.chunk_size], final=False)
+            del self.buffer[:self.chunk_size]
+        return len(data)
+
+    def close(self):
+        if self.closed:
+            return
+        if len(self.buffer) == self.chunk_size:
+            self._write_chunk(self.buffer, final=False)
+            self.buffer = bytearray()
+        self._write_chunk(self.buffer, final=True)
+        self.closed = True
+
+
+class SealReader:
+    """
+    Readable file object decrypting a sealed stream chunk by chunk
+    Raises SealError on a wrong passphrase, a modified or a truncated stream.
+
+    암호화된 스트림을 chunk단위로 복호화하는 읽기용 파일 객체
+    """
+
+    def __init__(self, fileobj, passphrase):
+        self.fileobj = fileobj
+        self.header = fileobj.read(HEADER_SIZE)
+        if len(self.header) != HEADER_SIZE:
+            raise SealError('Not a sealed secrets file')
+        magic, salt, log2_n, r, p, self.nonce_prefix, self.chunk_size = struct.unpack(
+            HEADER_FORMAT, self.header)
+        if magic != MAGIC:
+            raise SealError('Not a sealed secrets file')
+        self.aesgcm = get_aesgcm()(derive_key(passphrase, salt, log2_n, r, p))
+        self.counter = 0
+        self.buffer = b''
+        self.finished = False
+
+    def _read_chunk(self):
+        from cryptography.exceptions import InvalidTag
+        data = self.fileobj.read(self.chunk_size + TAG_SIZE)
+        if len(data) < TAG_SIZE:
+            raise SealError('Sealed secrets file is truncated')
+        # chunk_size보다 작은 chunk가 마지막 chunk
+        final = len(data) < self.chunk_size + TAG_SIZE
+        try:
+            chunk = self.aesgcm.decrypt(
+                get_nonce(self.nonce_prefix, self.counter, final), data, self.header)
+        except InvalidTag:
+            if self.counter == 0:
+                raise SealError('Wrong passphrase or corrupted sealed secrets file')
+            raise SealError('Sealed secrets file is corrupted (chunk %d)' % self.counter)
+        self.counter += 1
+        if final:
+            if self.fileobj.read(1):
+                raise SealError('Unexpected data after the last chunk')
+            self.finished = True
+        return chunk
+
+    def read(self, size=-1):
+        while not self.finished and (size < 0 or len(self.buffer) < size):
+            self.buffer += self._read_chunk()
+        if size < 0:
+            size = len(self.buffer)
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+
+def _exclude_compiled(tarinfo):
+    # compiled snapshot은 다른 layer에서 만들어지는 파일이므로 제외
+    if tarinfo.name.split('/')[1:2] == ['compiled']:
+        return None
+    return tarinfo
+
+
+def seal_secrets(project_dir, passphrase, sealed_file=None):
+    """
+    Stream the .config_secret directory through tar and the cipher into 'sealed_file'
+    (no plaintext archive is written to disk)
+
+    :param project_dir: project root
+    :param sealed_file: output path, default <project_dir>/secrets.sealed
+    :return: path of the sealed file
+    """
+    sealed_file = sealed_file or os.path.join(project_dir, SEALED_FILE_NAME)
+    secret_dir = os.path.join(project_dir, '.config_secret')
+    if not os.path.isdir(secret_dir):
+        raise SealError('%s does not exist' % secret_dir)
+    tmp_file = '%s.%d.tmp' % (sealed_file, os.getpid())
+    try:
+        with open(tmp_file, 'wb') as f:
+            writer = SealWriter(f, passphrase)
+            with tarfile.open(fileobj=writer, mode='w|') as tar:
+                tar.add(secret_dir, arcname='.config_secret', filter=_exclude_compiled)
+            writer.close()
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, sealed_file)
+    except BaseException:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        raise
+    return sealed_file
+
+
+def unseal_secrets(project_dir, passphrase, sealed_file=None):
+    """
+    Decrypt 'sealed_file' and extract the .config_secret directory into 'project_dir'
+    Files are extracted into a temporary directory and moved into place
+    only after the whole stream was authenticated.
+
+    :return: list of extracted file names
+    """
+    sealed_file = sealed_file or os.path.join(project_dir, SEALED_FILE_NAME)
+    tmp_dir = os.path.join(project_dir, '.config_secret.%d.tmp' % os.getpid())
+    try:
+        with open(sealed_file, 'rb') as f:
+            reader = SealReader(f, passphrase)
+            with tarfile.open(fileobj=reader, mode='r|') as tar:
+                for member in tar:
+                    if member.name.split('/')[0] != '.config_secret':
+                        raise SealError('Unexpected member in sealed secrets: %s' % member.name)
+                    if hasattr(tarfile, 'data_filter'):
+                        tar.extract(member, tmp_dir, filter='data')
+                    else:
+                        tar.extract(member, tmp_dir)
+            # tar 종료 블록 이후의 나머지를 읽어 마지막 chunk까지 검증
+            reader.read()
+
+        names = []
+        extracted_dir = os.path.join(tmp_dir, '.config_secret')
+        for dir_path, dir_names, file_names in os.walk(extracted_dir):
+            for file_name in file_names:
+                rel_path = os.path.relpath(os.path.join(dir_path, file_name), extracted_dir)
+                path = os.path.join(project_dir, '.config_secret', rel_path)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(os.path.join(dir_path, file_name), path)
+                names.append(rel_path)
+        return sorted(names)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
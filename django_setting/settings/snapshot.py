@@ -0,0 +1,44 @@
+import importlib.util
+import os
+from importlib.machinery import SourceFileLoader
+
+from ..utils import *
+
+__all__ = (
+    'get_config_loader',
+    'compile_settings',
+)
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def get_config_loader():
+    """
+    Import codes/settings/config_loader, the module generated projects use to load their config,
+    so the snapshot written here is the same one the settings would write
+    """
+    path = os.path.join(PACKAGE_DIR, 'codes', 'settings', 'config_loader')
+    loader = SourceFileLoader('django_setting_config_loader', path)
+    spec = importlib.util.spec_from_loader(loader.name, loader)
+    module = importlib.util.module_from_spec(spec)
+    loader.exec_module(module)
+    return module
+
+
+def compile_settings(project_dir, modes=None):
+    """
+    Resolve the public and secret layers of each mode into a snapshot module
+    The bytecode is written when the project's settings import the snapshot,
+    by the project's python (its version may differ from this one's)
+
+    :param project_dir: project root (the directory containing .config, .config_secret)
+    :param modes: list of modes, default all modes
+    :return: list of written snapshot files
+    """
+    config_loader = get_config_loader()
+    snapshot_files = []
+    for mode in modes or config_loader.CONFIG_MODES:
+        print_cmd_step_detail('Compile %s settings' % mode)
+        _, snapshot_file = config_loader.build_snapshot(project_dir, mode)
+        snapshot_files.append(snapshot_file)
+    return snapshot_files
@@ -1,17 +1,24 @@
 import json
 import os
-import re
 import shutil
-import subprocess
-from subprocess import DEVNULL, STDOUT
 
 from .functions import *
+from .skeleton import *
+from .transform import *
 from ..utils import *
 
 
+BASE_PACKAGES = (
+    'django',
+    'django_extensions',
+    'ipython',
+)
+
+
 class StartProject:
-    def __init__(self, project_name):
-        self.CWD = os.getcwd()
+    def __init__(self, project_name, refresh_wheelhouse=False, use_golden=True,
+                 python_version=None, cwd=None):
+        self.CWD = cwd or os.getcwd()
         self.PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         self.PACKAGE_CODE_DIR = os.path.join(self.PACKAGE_DIR, 'codes')
         self.PACKAGE_FILE_DIR = os.path.join(self.PACKAGE_DIR, 'files')
@@ -27,192 +34,249 @@ class StartProject:
         self.DJANGO_SETTINGS_DIR = os.path.join(self.DJANGO_CONFIG_DIR, 'settings')
 
         # pyenv version specify
-        self.python_version = select_python_version()
+        self.python_version = python_version or select_python_version()
 
         # pyenv
         self.pyenv_path = None
         self.pyenv = None
 
+        # wheelhouse
+        self.wheelhouse = Wheelhouse()
+        self.refresh_wheelhouse = refresh_wheelhouse
+
+        # golden virtualenv (None if disabled)
+        self.golden_env = GoldenEnv(
+            self.python_version, BASE_PACKAGES, wheelhouse=self.wheelhouse) if use_golden else None
+
         # Secret dict
         self.secret_dict = {}
 
+        # Template contents loaded from PACKAGE_CODE_DIR, PACKAGE_FILE_DIR
+        self.templates = {}
+        self.settings_transformer = None
+
+        # 생성은 완료됐지만 사용자가 확인해야 하는 문제들 (실행 마지막에 출력)
+        self.warnings = []
+
     def execute(self):
-        self.check_requirements()
-        self.make_project_dir()
-        self.pyenv_process()
-        self.project_structure_process()
-        self.django_structure_process()
-        self.manage_apps()
-        self.manage_settings()
-        self.manage_config_files()
-        self.finishing()
+        scheduler = StepScheduler()
+        # 각 단계는 print_cmd_step으로 자신의 span을 기록하므로 scheduler는 기록하지 않음
+        scheduler.add('check_requirements', self.check_requirements, profile=False)
+        scheduler.add('load_templates', self.load_templates, profile=False)
+        scheduler.add('make_project_dir', self.make_project_dir, profile=False,
+                      requires=['check_requirements'])
+        scheduler.add('pyenv_process', self.pyenv_process, profile=False,
+                      requires=['make_project_dir'])
+        scheduler.add('project_structure_process', self.project_structure_process, profile=False,
+                      requires=['make_project_dir', 'load_templates'])
+        scheduler.add('install_django_process', self.install_django_process, profile=False,
+                      requires=['pyenv_process'])
+        scheduler.add('freeze_requirements', self.freeze_requirements, profile=False,
+                      requires=['install_django_process', 'project_structure_process'])
+        scheduler.add('django_structure_process', self.django_structure_process, profile=False,
+                      requires=['install_django_process', 'load_templates'])
+        scheduler.add('manage_config_files', self.manage_config_files, profile=False,
+                      requires=['django_structure_process', 'project_structure_process'])
+        scheduler.add('finishing', self.finishing, profile=False,
+                      requires=['freeze_requirements', 'manage_config_files'])
+        scheduler.run()
+        scheduler.print_report()
+        for warning in self.warnings:
+            print('%sWarning: %s' % (output_prefix.get(), warning))
 
     def check_requirements(self):
-        print_cmd_step('Check requirements')
-        # pyenv check
-        check_pyenv_installed()
+        with print_cmd_step('Check requirements'):
+            # pyenv check
+            check_pyenv_installed()
+
+    def load_templates(self):
+        with print_cmd_step('Load templates'):
+            # 패키지의 codes, files 템플릿을 미리 읽어둠 (pip install과 동시에 진행)
+            template_paths = {
+                'gitignore': os.path.join(self.PACKAGE_FILE_DIR, 'gitignore'),
+                'member_models': os.path.join(self.PACKAGE_CODE_DIR, 'member', 'models'),
+                'settings_init': os.path.join(self.PACKAGE_CODE_DIR, 'settings', '__init__'),
+                'settings_base': os.path.join(self.PACKAGE_CODE_DIR, 'settings', 'base'),
+                'settings_config_loader': os.path.join(
+                    self.PACKAGE_CODE_DIR, 'settings', 'config_loader'),
+                'settings_base_installed_apps': os.path.join(
+                    self.PACKAGE_CODE_DIR, 'settings', 'base_installed_apps'),
+                'settings_debug': os.path.join(self.PACKAGE_CODE_DIR, 'settings', 'debug'),
+                'settings_deploy': os.path.join(self.PACKAGE_CODE_DIR, 'settings', 'deploy'),
+                'wsgi_init': os.path.join(self.PACKAGE_CODE_DIR, 'wsgi', '__init__'),
+                'wsgi_debug': os.path.join(self.PACKAGE_CODE_DIR, 'wsgi', 'debug'),
+                'wsgi_deploy': os.path.join(self.PACKAGE_CODE_DIR, 'wsgi', 'deploy'),
+            }
+            for name, path in template_paths.items():
+                self.templates[name] = open(path).read()
+            self.settings_transformer = get_settings_transformer(
+                self.project_name,
+                self.templates['settings_base'],
+                self.templates['settings_base_installed_apps'],
+            )
 
     def make_project_dir(self):
-        print_cmd_step('Make project directory')
-        os.chdir(self.CWD)
-        # Make project folder
-        if os.path.exists(self.project_name):
-            shutil.rmtree(self.project_name)
-        # subprocess.call('pyenv uninstall -f %s' % env_name, shell=True)
-        os.mkdir(self.project_name)
-        os.chdir(self.project_name)
+        with print_cmd_step('Make project directory'):
+            # Make project folder
+            if os.path.exists(self.PROJECT_DIR):
+                shutil.rmtree(self.PROJECT_DIR)
+            # subprocess.call('pyenv uninstall -f %s' % env_name, shell=True)
+            os.mkdir(self.PROJECT_DIR)
 
     def pyenv_process(self):
-        print_cmd_step('pyenv process')
-        os.chdir(self.PROJECT_DIR)
-        # pyenv make virtualenv
-        subprocess.call('pyenv virtualenv %s %s' % (
-            self.python_version,
-            self.env_name,
-        ), shell=True, stdout=DEVNULL, stderr=STDOUT)
-
-        # pyenv local
-        subprocess.call('pyenv local %s' % (
-            self.env_name,
-        ), shell=True, stdout=DEVNULL, stderr=STDOUT)
-
-        # pyenv path
-        self.pyenv_path = get_pyenv_path(self.env_name)
-        self.pyenv = Pyenv(self.pyenv_path)
+        with print_cmd_step('pyenv process'):
+            if self.golden_env:
+                # golden virtualenv를 복제해 가상환경 생성 (기본 패키지가 이미 설치되어 있음)
+                self.golden_env.build(refresh=self.refresh_wheelhouse)
+                self.pyenv_path = self.golden_env.clone(self.env_name)
+            else:
+                # pyenv make virtualenv
+                runner.run_sync('pyenv virtualenv %s %s' % (
+                    self.python_version,
+                    self.env_name,
+                ), cwd=self.PROJECT_DIR)
+
+            # pyenv local
+            runner.run_sync('pyenv local %s' % (
+                self.env_name,
+            ), cwd=self.PROJECT_DIR)
+
+            # pyenv path (golden virtualenv를 복제한 경우 복제한 경로 사용)
+            if not self.pyenv_path:
+                self.pyenv_path = get_pyenv_path(self.env_name)
+            self.pyenv = Pyenv(self.pyenv_path)
 
     def project_structure_process(self):
-        print_cmd_step('Project structure process')
-        os.chdir(self.PROJECT_DIR)
-        os.mkdir('.config')
-        os.mkdir('.config_secret')
-        os.mkdir('.requirements')
-        os.mkdir('.media')
-        os.mkdir('.static_root')
-
-        # .gitignore file
-        open('.gitignore', 'w').write(open(os.path.join(self.PACKAGE_FILE_DIR, 'gitignore')).read())
-
-        # install django, startproject
-        self.pyenv.call('pip install django django_extensions ipython')
-        self.pyenv.call('django-admin startproject config')
-        self.pyenv.call('pip freeze > .requirements/debug.txt')
-
-        # django application folder rename
-        os.rename('config', 'django_app')
+        with print_cmd_step('Project structure process'):
+            for dir_name in ('.config', '.config_secret', '.requirements', '.media',
+                             '.static_root'):
+                os.mkdir(os.path.join(self.PROJECT_DIR, dir_name))
+
+            # .gitignore file
+            open(os.path.join(self.PROJECT_DIR, '.gitignore'), 'w').write(
+                self.templates['gitignore'])
+
+    def install_django_process(self):
+        with print_cmd_step('Install Django'):
+            # install django (golden virtualenv에는 이미 설치되어 있음)
+            if not self.golden_env:
+                self.wheelhouse.install(self.pyenv, self.python_version, BASE_PACKAGES,
+                                        cwd=self.PROJECT_DIR, refresh=self.refresh_wheelhouse)
+
+    def freeze_requirements(self):
+        with print_cmd_step('Freeze requirements'):
+            self.pyenv.call('pip freeze > .requirements/debug.txt', cwd=self.PROJECT_DIR)
 
     def django_structure_process(self):
-        print_cmd_step('Django structure process')
-        os.chdir(self.DJANGO_DIR)
-        os.mkdir('templates')
-        os.mkdir('static')
-
-        # Create apps
-        self.pyenv.call('python manage.py startapp member')
+        with print_cmd_step('Django structure process'):
+            # 가상환경에 설치된 Django의 project_template, app_template을 직접 렌더링
+            # (django-admin startproject, manage.py startapp을 실행하지 않음)
+            django_package_dir = find_django_package(self.pyenv_path)
+            files = render_template_dir(
+                os.path.join(django_package_dir, 'conf', 'project_template'),
+                get_template_context(
+                    django_package_dir,
+                    project_name='config',
+                    project_directory=self.DJANGO_DIR,
+                    secret_key=get_random_secret_key(),
+                ),
+                rename={'project_name': 'config'},
+            )
+            app_files = render_template_dir(
+                os.path.join(django_package_dir, 'conf', 'app_template'),
+                get_template_context(
+                    django_package_dir,
+                    app_name='member',
+                    camel_case_app_name='Member',
+                    app_directory=os.path.join(self.DJANGO_DIR, 'member'),
+                ),
+            )
+            files.update({'member/%s' % path: value for path, value in app_files.items()})
+            files.update(self.manage_apps())
+            original_settings, _ = files.pop('config/settings.py')
+            files.update(self.manage_settings(original_settings))
+            files.pop('config/wsgi.py')
+            files.update(self.manage_wsgi())
+
+            os.makedirs(os.path.join(self.DJANGO_DIR, 'templates'))
+            os.mkdir(os.path.join(self.DJANGO_DIR, 'static'))
+            for path, (content, template_path) in files.items():
+                file_path = os.path.join(self.DJANGO_DIR, *path.split('/'))
+                os.makedirs(os.path.dirname(file_path), exist_ok=True)
+                open(file_path, 'w').write(content)
+                if template_path:
+                    shutil.copymode(template_path, file_path)
 
     def manage_apps(self):
-        print_cmd_step('Manage Django applications')
-        os.chdir(self.DJANGO_DIR)
-
-        def manage_member():
-            open('member/models.py', 'w').write(
-                open(os.path.join(self.PACKAGE_CODE_DIR, 'member', 'models')).read())
-
-        manage_member()
-
-    def manage_settings(self):
-        print_cmd_step('Manage Django settings')
-        # 기존 settings.py파일을 읽고 지움
-        os.chdir(self.DJANGO_CONFIG_DIR)
-        original_settings = open('settings.py').read()
-        os.remove('settings.py')
-
-        # settings패키지를 생성
-        os.mkdir('settings')
-        open('settings/__init__.py', 'w').write(
-            open(os.path.join(self.PACKAGE_CODE_DIR, 'settings', '__init__')).read())
+        """
+        :return: dict of application file path: (content, None) replacing the rendered files
+        """
+        return {
+            'member/models.py': (self.templates['member_models'], None),
+        }
 
-        # settings/base.py파일 생성
-        base_settings = self._sub_settings(self._get_secret_values(original_settings))
-        open('settings/base.py', 'w').write(base_settings)
+    def manage_settings(self, original_settings):
+        """
+        Split the rendered settings.py into the settings package (base, debug, deploy)
+
+        :return: dict of settings file path: (content, None)
+        """
+        result = self.settings_transformer.transform(original_settings)
+        self.secret_dict.update(result.captures)
+        base_settings = result.text
+        return {
+            'config/settings/__init__.py': (self.templates['settings_init'], None),
+            'config/settings/base.py': (base_settings, None),
+            'config/settings/config_loader.py': (self.templates['settings_config_loader'], None),
+            'config/settings/debug.py': (self.templates['settings_debug'], None),
+            'config/settings/deploy.py': (self.templates['settings_deploy'], None),
+        }
 
-        # settings/debug.py파일 생성
-        open('settings/debug.py', 'w').write(
-            open(os.path.join(self.PACKAGE_CODE_DIR, 'settings', 'debug')).read())
+    def manage_wsgi(self):
+        """
+        Replace the rendered wsgi.py with a package of a module per mode
+        (config.wsgi.debug, config.wsgi.deploy used by the uwsgi config files)
+
+        :return: dict of wsgi file path: (content, None)
+        """
+        return {
+            'config/wsgi/__init__.py': (self.templates['wsgi_init'], None),
+            'config/wsgi/debug.py': (self.templates['wsgi_debug'], None),
+            'config/wsgi/deploy.py': (self.templates['wsgi_deploy'], None),
+        }
 
     def manage_config_files(self):
-        os.chdir(self.PROJECT_DIR)
-        print_cmd_step('Manage Django config files')
-        # secret config to json file
-        secret_config = {
-            'django': {
-                'secret_key': self.secret_dict['secret_key'],
+        with print_cmd_step('Manage Django config files'):
+            # secret config to json file
+            secret_config = {
+                'django': {
+                    'secret_key': self.secret_dict['secret_key'],
+                }
             }
-        }
-        open('.config_secret/settings_common.json', 'w').write(
-            json.dumps(secret_config, indent=4, sort_keys=True))
+            open(os.path.join(self.PROJECT_DIR, '.config_secret', 'settings_common.json'),
+                 'w').write(json.dumps(secret_config, indent=4, sort_keys=True))
 
     def finishing(self):
-        print_cmd_step('Finishing')
-        os.chdir(self.DJANGO_DIR)
-        self.pyenv.call('python manage.py makemigrations')
-        self.pyenv.call('python manage.py migrate')
-
-        os.chdir(self.PROJECT_DIR)
-        subprocess.call('git init', shell=True, stdout=DEVNULL)
-        subprocess.call('git add -A', shell=True, stdout=DEVNULL)
-        subprocess.call('git commit -m \'First commit\'', shell=True, stdout=DEVNULL)
-
-    def _get_secret_values(self, settings):
-        secret_list = [
-            {
-                'regex': r'SECRET_KEY = \'(?P<secret_key>.*?)\'.*?\n',
-                'key': 'secret_key',
-                'group': 'secret_key',
-                'preserve': False
-            }
-        ]
-        for secret in secret_list:
-            value = re.search(secret['regex'], settings).group(secret['group'])
-            self.secret_dict[secret['key']] = value
-            if value and not secret.get('preserve'):
-                settings = re.sub(secret['regex'], '', settings)
-        return settings
-
-    def _sub_settings(self, settings):
-        import_pattern = r'import os'
-        import_repl = r'import os\nimport json'
-        project_name_pattern = 'Django settings for config project.'
-        project_name_repl = 'Django settings for %s project.' % self.project_name
-        paths_pattern = r'\n(BASE_DIR.*?\n)'
-        paths_repl = open(os.path.join(self.PACKAGE_CODE_DIR, 'settings', 'base')).read()
-        remove_comment_secret_pattern = re.compile(r'(# SECURITY WARNING: keep the secret.*?\n)', re.DOTALL)
-        remove_comment_secret_repl = ''
-        templates_pattern = re.compile(
-            r'(?P<before>\nTEMPLATES = .*?\n)(?P<indent>\s+)(?P<key>\'DIRS\': )(?P<value>\[\]),',
-            re.DOTALL
-        )
-        templates_repl = r'\g<before>\g<indent>\g<key>[\n\g<indent>    TEMPLATE_DIR,\n\g<indent>],'
-        installed_apps_pattern = re.compile(r'(\nINSTALLED_APPS = .*?)(\n])', re.DOTALL)
-        installed_apps_repl = r'%s' % (
-            open(os.path.join(self.PACKAGE_CODE_DIR, 'settings', 'base_installed_apps')).read()
-        )
-
-        replacements = {
-            # import
-            import_pattern: import_repl,
-            # project name
-            project_name_pattern: project_name_repl,
-            # root, template, static paths
-            paths_pattern: paths_repl,
-            # remove comments
-            remove_comment_secret_pattern: remove_comment_secret_repl,
-            # template dirs
-            templates_pattern: templates_repl,
-            # INSTALLED_APPS
-            installed_apps_pattern: installed_apps_repl,
-        }
-
-        for src, target in replacements.items():
-            settings = re.sub(src, target, settings)
-
-        return settings
+        with print_cmd_step('Finishing'):
+            self.pyenv.call('python manage.py makemigrations', cwd=self.DJANGO_DIR)
+            self.pyenv.call('python manage.py migrate', cwd=self.DJANGO_DIR)
+
+            runner.run_sync('git init', cwd=self.PROJECT_DIR)
+            runner.run_sync('git add -A', cwd=self.PROJECT_DIR)
+            # git user가 설정되지 않은 경우 첫 commit에만 기본값 사용 (설정된 값은 그대로 사용)
+            identity = []
+            for key, value in (('user.name', 'django-setting'),
+                               ('user.email', 'django-setting@localhost')):
+                result = runner.run_sync(['git', 'config', key], cwd=self.PROJECT_DIR,
+                                         check=False)
+                if result.returncode != 0 or not result.stdout.strip():
+                    identity += ['-c', '%s=%s' % (key, value)]
+            result = runner.run_sync(['git'] + identity + ['commit', '-m', 'First commit'],
+                                     cwd=self.PROJECT_DIR, check=False)
+            if result.returncode != 0:
+                output = (result.stderr or result.stdout).strip()
+                self.warnings.append(
+                    'the first git commit failed (exit status %d), the files are staged '
+                    'but not committed in %s%s' % (
+                        result.returncode, self.PROJECT_DIR,
+                        '\n' + output.splitlines()[-1] if output else ''))
@@ -0,0 +1,100 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from . import StartProject, BASE_PACKAGES
+from .functions import *
+from ..utils import *
+
+__all__ = (
+    'load_manifest',
+    'BulkStartProject',
+)
+
+
+def load_manifest(path):
+    """
+    Read a project manifest (YAML or JSON)
+
+    ex) services.yaml
+        python_version: 3.6.1   # optional, selected once if not given
+        workers: 4              # optional
+        directory: services     # optional, relative to the current directory
+        projects:
+          - auth
+          - name: billing
+    :return: dict
+    """
+    manifest = load_data_file(path)
+    manifest['projects'] = [
+        project if isinstance(project, dict) else {'name': project}
+        for project in manifest.get('projects', [])
+    ]
+    return manifest
+
+
+class BulkStartProject:
+    """
+    Create every project of a manifest with a bounded thread pool.
+    Requirements, python version, wheelhouse and golden virtualenv are resolved once
+    and shared by all projects.
+
+    manifest에 정의된 프로젝트들을 스레드 풀로 동시에 생성
+    """
+
+    def __init__(self, manifest_path, workers=None, refresh_wheelhouse=False, use_golden=True):
+        self.manifest = load_manifest(manifest_path)
+        self.CWD = os.path.join(os.getcwd(), self.manifest.get('directory', ''))
+        self.workers = workers or self.manifest.get('workers', 4)
+        self.refresh_wheelhouse = refresh_wheelhouse
+        self.use_golden = use_golden
+        self.python_version = None
+        self.results = []
+
+    def execute(self):
+        with print_cmd_step('Check requirements'):
+            check_pyenv_installed()
+            self.python_version = (self.manifest.get('python_version') or
+                                   select_python_version())
+            os.makedirs(self.CWD, exist_ok=True)
+
+        # 모든 프로젝트가 공유하는 wheelhouse, golden virtualenv를 미리 준비
+        with print_cmd_step('Prepare shared packages'):
+            if self.use_golden:
+                GoldenEnv(self.python_version, BASE_PACKAGES).build(
+                    refresh=self.refresh_wheelhouse)
+            else:
+                Wheelhouse().fill(
+                    Pyenv(os.path.join(get_pyenv_root(), 'versions', self.python_version)),
+                    self.python_version, BASE_PACKAGES, refresh=self.refresh_wheelhouse)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            self.results = list(executor.map(self.start_project, self.manifest['projects']))
+        self.print_summary()
+        return all(result['status'] == 'ok' for result in self.results)
+
+    def start_project(self, project):
+        start = time.perf_counter()
+        result = {'name': project['name'], 'status': 'ok', 'error': ''}
+        # 동시에 생성되는 프로젝트들의 출력 구분
+        token = output_prefix.set('[%s] ' % project['name'])
+        try:
+            StartProject(
+                project['name'],
+                use_golden=self.use_golden,
+                python_version=self.python_version,
+                cwd=self.CWD,
+            ).execute()
+        except (Exception, SystemExit) as e:
+            result['status'] = 'failed'
+            result['error'] = repr(e)
+        finally:
+            output_prefix.reset(token)
+        result['time'] = time.perf_counter() - start
+        return result
+
+    def print_summary(self):
+        print_cmd('Summary')
+        for result in self.results:
+            print('  {:30}{:8}{:8.1f}s  {}'.format(
+                result['name'], result['status'], result['time'], result['error']))
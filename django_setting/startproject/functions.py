@@ -1,16 +1,20 @@
-import re
 import shutil
 import sys
-from subprocess import Popen, PIPE
-from ..utils.common import get_subprocess_output
+
+from ..utils.discovery import get_pyenv_index
 
 __all__ = (
+    'VirtualenvNotFoundError',
     'check_pyenv_installed',
     'select_python_version',
     'get_pyenv_path',
 )
 
 
+class VirtualenvNotFoundError(Exception):
+    pass
+
+
 def check_pyenv_installed():
     """
     Check pyenv is installed on system
@@ -28,17 +32,12 @@ def check_pyenv_installed():
 
 def select_python_version():
     """
-    Run the 'pyenv versions' command and parse the results to return a list of versions
+    Returns the python version to use, selected among the versions installed by pyenv
 
-    'pyenv versions'명령어를 실행 후 결과를 파싱해 버전 목록을 반환합니다
-    :return: pyenv installed python versions
-                (ex: [2.7.12, 3.6.1, 3.6.2])
+    pyenv로 설치된 python 버전 중 사용할 버전을 선택해 반환합니다
+    :return: selected python version (ex: 3.6.1)
     """
-    p = Popen(['pyenv', 'versions'], stdout=PIPE)
-    out, err = p.communicate()
-    out = re.sub(r' \(set by.*\)', '', out.decode('utf-8').replace('*', ''))
-    version_list = [x.strip() for x in out.split('\n') if
-                    x.strip().startswith('3') and '/' not in x]
+    version_list = [x for x in get_pyenv_index().versions if x.startswith('3')]
     if len(version_list) == 1:
         return version_list[0]
     select_string = 'Available python versions:\n'
@@ -60,16 +59,11 @@ def get_pyenv_path(env_name):
     'env_name'으로 주어진 가상환경(pyenv로 생성한 가상환경에서만 검색)의 경로를 반환합니다.
     :param env_name: virtualenv's name
     :return: Path of the virtual environment named 'env_name'
+    :raise VirtualenvNotFoundError: no pyenv virtualenv is named 'env_name'
     """
-
-    env_list = get_subprocess_output('pyenv virtualenvs').split('\n')
-
-    def get_version_path(m):
-        return '{},{}'.format(m.group(1), m.group(2))
-
-    p = re.compile(r'\s*([\w\W]+?)\s\(created from\s([\w\W]+?)\)')
-    env_list = [re.sub(p, get_version_path, env).split(',') for env in env_list if
-                env.strip().startswith(env_name)]
-    env = env_list[0]
-    path = '{}/envs/{}'.format(env[1], env[0])
+    index = get_pyenv_index()
+    path = index.get_virtualenv_path(env_name)
+    if path is None:
+        raise VirtualenvNotFoundError('pyenv virtualenv "%s" not found in %s' % (
+            env_name, index.versions_dir))
     return path
@@ -0,0 +1,103 @@
+import ast
+import glob
+import os
+import re
+import secrets
+
+__all__ = (
+    'find_django_package',
+    'get_django_version',
+    'get_random_secret_key',
+    'get_template_context',
+    'render_template_text',
+    'render_template_dir',
+)
+
+SECRET_KEY_CHARS = 'abcdefghijklmnopqrstuvwxyz0123456789!@#$%^&*(-_=+)'
+RE_TEMPLATE_VARIABLE = re.compile(r'{{\s*(\w+)\s*}}')
+RE_TEMPLATE_TAG = re.compile(r'{%.*?%}')
+
+
+def find_django_package(env_path):
+    """
+    Returns the path of the django package installed in the virtualenv 'env_path'
+
+    'env_path' 가상환경에 설치된 django 패키지의 경로를 반환합니다
+    :param env_path: virtualenv's path
+    :return: Path of the django package
+    """
+    paths = glob.glob(os.path.join(env_path, 'lib', 'python*', 'site-packages', 'django'))
+    if not paths:
+        raise FileNotFoundError('Django is not installed in %s' % env_path)
+    return paths[0]
+
+
+def get_django_version(django_dir):
+    """
+    Read django.VERSION from the package source without importing it
+
+    :return: VERSION tuple (ex: (1, 11, 2, 'final', 0))
+    """
+    source = open(os.path.join(django_dir, '__init__.py')).read()
+    for node in ast.parse(source).body:
+        if isinstance(node, ast.Assign) and any(
+                isinstance(target, ast.Name) and target.id == 'VERSION' for target in node.targets):
+            return ast.literal_eval(node.value)
+    raise ValueError('VERSION is not found in %s' % django_dir)
+
+
+def get_random_secret_key():
+    return ''.join(secrets.choice(SECRET_KEY_CHARS) for _ in range(50))
+
+
+def get_template_context(django_dir, **kwargs):
+    """
+    Context variables given by 'django-admin startproject/startapp' to the templates
+    """
+    version = get_django_version(django_dir)
+    context = {
+        'django_version': '.'.join(str(part) for part in version[:3]),
+        'docs_version': 'dev' if version[3] != 'final' else '%d.%d' % version[:2],
+        'unicode_literals': '',
+    }
+    context.update(kwargs)
+    return context
+
+
+def render_template_text(text, context):
+    """
+    Render the variables ({{ name }}) of a Django template
+    Raises ValueError if the template uses a tag ({% ... %}) that this renderer can't handle.
+    """
+    tag = RE_TEMPLATE_TAG.search(text)
+    if tag:
+        raise ValueError('Unsupported template tag: %s' % tag.group())
+    return RE_TEMPLATE_VARIABLE.sub(lambda m: str(context[m.group(1)]), text)
+
+
+def render_template_dir(template_dir, context, rename=None):
+    """
+    Render the files of a Django project/app template directory in memory
+
+    :param template_dir: project_template or app_template directory
+    :param context: template context variables
+    :param rename: dict of path component: replacement (ex: {'project_name': 'config'})
+    :return: dict of relative path: (rendered content, template file path)
+    """
+    rename = rename or {}
+    rendered = {}
+    for root, dirs, files in os.walk(template_dir):
+        dirs[:] = [name for name in dirs if name != '__pycache__']
+        for file_name in files:
+            if file_name.endswith(('.pyc', '.pyo', '.py.class')):
+                continue
+            template_path = os.path.join(root, file_name)
+            relative_path = os.path.relpath(template_path, template_dir)
+            parts = [rename.get(part, part) for part in relative_path.split(os.sep)]
+            content = open(template_path).read()
+            if parts[-1].endswith('.py-tpl'):
+                parts[-1] = parts[-1][:-len('-tpl')]
+            if parts[-1].endswith('.py'):
+                content = render_template_text(content, context)
+            rendered['/'.join(parts)] = (content, template_path)
+    return rendered
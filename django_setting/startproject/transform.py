@@ -0,0 +1,239 @@
+import re
+from collections import namedtuple
+
+__all__ = (
+    'SettingsTransformError',
+    'Rule',
+    'RuleMatch',
+    'SettingsTransformer',
+    'TransformResult',
+    'get_settings_transformer',
+)
+
+TransformResult = namedtuple('TransformResult', ['text', 'matches', 'captures'])
+
+RE_REPL_TOKEN = re.compile(r'\\(?:g<(?P<name>\w+)>|(?P<number>[0-9]{1,2})|(?P<char>.))', re.DOTALL)
+REPL_ESCAPES = {'n': '\n', 'r': '\r', 't': '\t', '\\': '\\'}
+# 규칙 pattern의 group, backreference (합쳐진 pattern에서 규칙마다 이름을 구분하기 위해 변경)
+RE_PATTERN_TOKEN = re.compile(
+    r'\\(?P<backref>[1-9][0-9]?)|\\.|\[(?:\\.|[^\]])*\]'
+    r'|\(\?P<(?P<name>\w+)>|\(\?P=(?P<ref>\w+)\)|(?P<group>\((?!\?))', re.DOTALL)
+INLINE_FLAGS = ((re.IGNORECASE, 'i'), (re.MULTILINE, 'm'), (re.DOTALL, 's'), (re.VERBOSE, 'x'))
+
+
+class SettingsTransformError(Exception):
+    pass
+
+
+class Rule:
+    """
+    A substitution applied by SettingsTransformer
+
+    :param name: rule name, used in the match report and errors
+    :param pattern: regex pattern
+    :param repl: replacement template (as re.sub) or callable receiving the match
+    :param flags: regex flags of the pattern
+    :param required: raise SettingsTransformError if the rule does not match
+    :param capture: dict of capture key: group name, values stored in TransformResult.captures
+    """
+
+    def __init__(self, name, pattern, repl, flags=0, required=True, capture=None):
+        self.name = name
+        self.pattern = pattern
+        self.repl = repl
+        self.flags = flags
+        self.required = required
+        self.capture = capture or {}
+        self.regex = re.compile(pattern, flags)
+        self._repl_parts = None if callable(repl) else self._compile_repl(repl)
+
+    def __repr__(self):
+        return 'Rule({})'.format(self.name)
+
+    @staticmethod
+    def _compile_repl(repl):
+        """
+        Parse a re.sub replacement template once into literal strings and group references
+        (match.expand parses the template again on every call)
+        """
+        parts = []
+        position = 0
+        for token in RE_REPL_TOKEN.finditer(repl):
+            parts.append(repl[position:token.start()])
+            group = token.group('name') or token.group('number')
+            if group:
+                parts.append((int(group) if group.isdigit() else group,))
+            else:
+                parts.append(REPL_ESCAPES.get(token.group('char'), token.group()))
+            position = token.end()
+        parts.append(repl[position:])
+        return [part for part in parts if part]
+
+    def expand(self, match):
+        if self._repl_parts is None:
+            return self.repl(match)
+        return ''.join(
+            part if isinstance(part, str) else match.group(part[0]) or ''
+            for part in self._repl_parts)
+
+    def get_combined_pattern(self, prefix):
+        """
+        The pattern as one branch of a combined alternation:
+        its groups are renamed '<prefix><number>', its flags are applied inline,
+        and an empty group named 'prefix' at its end tells which rule matched
+
+        :return: (pattern, dict of group name or number: combined group name or number)
+        """
+        groups = {}
+        number = 0
+
+        def replace(token):
+            nonlocal number
+            if token.group('backref'):
+                return '(?P=%s)' % groups[int(token.group('backref'))]
+            if token.group('ref'):
+                return '(?P=%s)' % groups[token.group('ref')]
+            if token.group('name') or token.group('group'):
+                number += 1
+                groups[number] = '%s%d' % (prefix, number)
+                if token.group('name'):
+                    groups[token.group('name')] = groups[number]
+                return '(?P<%s>' % groups[number]
+            return token.group()
+
+        pattern = RE_PATTERN_TOKEN.sub(replace, self.pattern)
+        flags = ''.join(letter for flag, letter in INLINE_FLAGS if self.flags & flag)
+        if flags:
+            pattern = '(?%s:%s)' % (flags, pattern)
+        # 한 번에 하나의 branch만 매치되므로 전체 매치가 규칙의 매치
+        groups[0] = 0
+        return '%s(?P<%s>)' % (pattern, prefix), groups
+
+    def get_combined_repl_parts(self, groups):
+        """
+        :param groups: groups returned by get_combined_pattern
+        :return: replacement parts referring to the groups of the combined pattern,
+                 None for a callable replacement
+        """
+        if self._repl_parts is None:
+            return None
+        return [part if isinstance(part, str) else (groups[part[0]],)
+                for part in self._repl_parts]
+
+
+class RuleMatch:
+    """
+    Match of one rule inside the combined pattern, with the groups of the rule pattern
+    (the interface of re.Match used by the replacements and captures)
+
+    합쳐진 pattern의 매치를 규칙 pattern의 group 이름, 번호로 사용
+    """
+
+    def __init__(self, match, groups):
+        self._match = match
+        self._groups = groups
+
+    def group(self, group=0):
+        return self._match.group(self._groups[group])
+
+    def start(self, group=0):
+        return self._match.start(self._groups[group])
+
+    def end(self, group=0):
+        return self._match.end(self._groups[group])
+
+
+class SettingsTransformer:
+    """
+    Combines the rules into one alternation, scans the original settings text once
+    and dispatches each match to its rule by the empty group closing the rule's branch.
+    Rules never see each other's output. Matches can not overlap: where several rules match
+    at the same position, the first rule listed wins.
+
+    Rule patterns should start with a literal character, not a group or flags
+    (give flags inline, ex: (?s:.*?)): re skips a branch whose first character differs
+    without entering it, and a prefix shared by every rule ('\\n') is searched directly.
+
+    규칙들을 하나의 pattern으로 합쳐 원본 텍스트를 한 번만 탐색하고 결과 텍스트를 만든다
+    """
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        patterns = []
+        self._rules = {}
+        for index, rule in enumerate(self.rules):
+            name = 'r%d_' % index
+            pattern, groups = rule.get_combined_pattern(name)
+            patterns.append(pattern)
+            captures = [(key, groups[group]) for key, group in rule.capture.items()]
+            self._rules[name] = (rule, groups, captures, rule.get_combined_repl_parts(groups))
+        self.regex = re.compile('|'.join(patterns))
+
+    def transform(self, text):
+        """
+        :return: TransformResult(text, matches(dict of rule name: count), captures)
+        """
+        matches = {rule.name: 0 for rule in self.rules}
+        captures = {}
+        pieces = []
+        position = 0
+        for match in self.regex.finditer(text):
+            # 규칙 branch의 마지막 group이 가장 나중에 닫히므로 lastgroup은 매치된 규칙의 group
+            rule, groups, rule_captures, repl_parts = self._rules[match.lastgroup]
+            matches[rule.name] += 1
+            for key, group in rule_captures:
+                captures[key] = match.group(group)
+            pieces.append(text[position:match.start()])
+            if repl_parts is None:
+                pieces.append(rule.repl(RuleMatch(match, groups)))
+            else:
+                pieces.extend(part if isinstance(part, str) else match.group(part[0]) or ''
+                              for part in repl_parts)
+            position = match.end()
+        pieces.append(text[position:])
+
+        missing = [rule.name for rule in self.rules if rule.required and not matches[rule.name]]
+        if missing:
+            raise SettingsTransformError(
+                'Settings rules did not match (Django settings template changed?): %s' %
+                ', '.join(missing))
+        return TransformResult(''.join(pieces), matches, captures)
+
+
+def _imports_repl(match):
+    if match.group().strip() == 'import os':
+        return match.group()
+    # Django 3.1+ 템플릿은 pathlib을 사용하므로 os를 import
+    return '%simport os\n' % match.group()
+
+
+def get_settings_transformer(project_name, base_code, installed_apps_code):
+    """
+    Rules turning the settings.py rendered by Django into config/settings/base.py
+
+    :param project_name: project name written in the settings docstring
+    :param base_code: codes/settings/base, replaces the BASE_DIR line
+    :param installed_apps_code: codes/settings/base_installed_apps, closes INSTALLED_APPS
+    """
+    # 모든 규칙은 줄바꿈과 문자로 시작 (합쳐진 pattern은 줄의 시작에서만 매치를 시도하고,
+    # re는 첫 문자가 다른 규칙을 바로 건너뜀)
+    return SettingsTransformer([
+        Rule('project_name', r'\nDjango settings for config project\.',
+             '\nDjango settings for %s project.' % project_name),
+        Rule('imports', r'\n(?:import os|from pathlib import Path)\n', _imports_repl),
+        Rule('paths', r'\nBASE_DIR.*?\n', lambda match: base_code),
+        Rule('remove_comment_secret', r'\n# SECURITY WARNING: keep the secret.*', ''),
+        Rule('secret_key', r'\nSECRET_KEY = (?P<quote>[\'"])(?P<secret_key>.*?)(?P=quote).*', '',
+             capture={'secret_key': 'secret_key'}),
+        Rule('templates',
+             r'\nTEMPLATES(?P<before> = (?s:.*?)\n)(?P<indent>\s+)(?P<key>[\'"]DIRS[\'"]: )\[\],',
+             r'\nTEMPLATES\g<before>\g<indent>\g<key>'
+             r'[\n\g<indent>    TEMPLATE_DIR,\n\g<indent>],'),
+        # installed_apps_code의 \g<1>은 ' = [...' 부분
+        Rule('installed_apps', r'\nINSTALLED_APPS( = (?s:.*?))(\n])',
+             '\nINSTALLED_APPS' + installed_apps_code),
+        # Django 3.1+ 템플릿의 BASE_DIR / 'db.sqlite3' (BASE_DIR이 str로 바뀌므로 os.path.join 사용)
+        Rule('sqlite_name',
+             r'\n (?P<before>[ \t]*[\'"]NAME[\'"]: )BASE_DIR / (?P<db_name>[\'"]db\.sqlite3[\'"])',
+             r'\n \g<before>os.path.join(BASE_DIR, \g<db_name>)', required=False),
+    ])
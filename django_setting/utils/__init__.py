@@ -1,2 +1,10 @@
 from .cls import *
 from .common import *
+from .config import *
+from .discovery import *
+from .fs import *
+from .profiling import *
+from .runner import *
+from .scheduler import *
+from .wheelhouse import *
+from .golden import *
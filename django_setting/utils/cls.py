@@ -1,4 +1,6 @@
-import subprocess
+import shlex
+
+from .runner import runner
 
 __all__ = (
     'Pyenv',
@@ -9,8 +11,14 @@ class Pyenv:
     def __init__(self, pyenv_path):
         self.pyenv_path = pyenv_path
 
-    def call(self, cmd):
-        subprocess.call('%s/bin/%s' % (
-            self.pyenv_path,
+    def call(self, cmd, cwd=None, **kwargs):
+        """
+        Run 'cmd' from the virtualenv's bin directory through the shared runner
+        'cmd' is a shell command line, its arguments are quoted by the caller
+
+        :return: CommandResult, raises CommandError if the command fails
+        """
+        return runner.run_sync('%s/bin/%s' % (
+            shlex.quote(self.pyenv_path),
             cmd
-        ), shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT)
+        ), cwd=cwd, **kwargs)
@@ -1,39 +1,124 @@
-import subprocess
-from subprocess import Popen, PIPE
+import json
+import os
+
+from .profiling import profiler
+from .runner import output_prefix, runner
 
 __all__ = (
+    'get_cache_dir',
+    'load_data_file',
     'get_subprocess_output',
+    'get_pyenv_root',
     'get_latest_pyenv_python_version',
+    'strtobool',
     'print_cmd',
     'print_cmd_step',
     'print_cmd_step_detail',
 )
 
 
+def get_cache_dir(*paths):
+    """
+    Returns the django_setting cache directory (DJANGO_SETTING_HOME or ~/.django-setting),
+    creating it if needed
+
+    django_setting이 사용하는 캐시 디렉토리의 경로를 반환합니다
+    :param paths: sub directory names
+    :return: Path of the cache directory
+    """
+    root = os.environ.get('DJANGO_SETTING_HOME') or os.path.join(
+        os.path.expanduser('~'), '.django-setting')
+    path = os.path.join(root, *paths)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def load_data_file(path):
+    """
+    Read a YAML (.yaml, .yml, needs PyYAML) or JSON file
+
+    :param path: file path
+    :return: loaded data
+    """
+    content = open(path).read()
+    if path.endswith(('.yaml', '.yml')):
+        try:
+            import yaml
+        except ImportError:
+            raise ImportError('PyYAML is required to read %s (pip install pyyaml)' % path)
+        return yaml.safe_load(content)
+    return json.loads(content)
+
+
 def get_subprocess_output(cmd):
-    p = Popen(cmd, stdout=PIPE, stderr=PIPE, shell=True)
-    out, err = p.communicate()
-    return out.decode('utf-8')
+    return runner.run_sync(cmd, check=False).stdout
+
+
+def get_pyenv_root():
+    """
+    Returns the pyenv root directory (PYENV_ROOT, ~/.pyenv or the output of 'pyenv root')
+
+    pyenv의 루트 디렉토리 경로를 반환합니다
+    """
+    if os.environ.get('PYENV_ROOT'):
+        return os.environ['PYENV_ROOT']
+    default_root = os.path.join(os.path.expanduser('~'), '.pyenv')
+    if os.path.isdir(default_root):
+        return default_root
+    return get_subprocess_output('pyenv root').strip()
 
 
 def get_latest_pyenv_python_version():
-    # pyenv install last version
-    p = Popen(['pyenv', 'install', '--list'], stdout=PIPE)
-    out, err = p.communicate()
-    out = out.decode('utf-8')
-    version_list = out.split('\n')
-    version_list = [x.strip() for x in version_list if x.strip().startswith('3') and 'dev' not in x]
-    last_version = version_list.pop()
-    return last_version
+    """
+    Returns the latest stable python 3 version installable with 'pyenv install'
+    Reads the python-build definitions directory, runs 'pyenv install --list' if it is not found
+    """
+    from .discovery import get_pyenv_index, version_sort_key, RE_STABLE_VERSION
+    version_list = get_pyenv_index().install_list
+    if not version_list:
+        out = runner.run_sync(['pyenv', 'install', '--list']).stdout
+        version_list = [x.strip() for x in out.split('\n')]
+    version_list = sorted(
+        (x for x in version_list if x.startswith('3') and RE_STABLE_VERSION.match(x)),
+        key=version_sort_key,
+    )
+    return version_list[-1]
+
+
+def strtobool(value):
+    """
+    Convert a yes/no answer to bool (same values as distutils.util.strtobool)
+    """
+    value = value.strip().lower()
+    if value in ('y', 'yes', 't', 'true', 'on', '1'):
+        return True
+    if value in ('n', 'no', 'f', 'false', 'off', '0'):
+        return False
+    raise ValueError('invalid truth value %r' % value)
 
 
 def print_cmd(value):
-    print('== DjangoSetting - %s ==' % value)
+    """
+    Print the command banner
+    :return: Span recording the command when used as a context manager
+    """
+    print('%s== DjangoSetting - %s ==' % (output_prefix.get(), value))
+    return profiler.span(value, 'command')
 
 
 def print_cmd_step(value):
-    print('- %s' % value)
+    """
+    Print the step banner
+    :return: Span recording the step when used as a context manager
+    """
+    print('%s- %s' % (output_prefix.get(), value))
+    return profiler.span(value, 'step')
 
 
 def print_cmd_step_detail(value):
-    print(' %s' % value)
+    """
+    Print the step detail
+    :return: Span recording the detail when used as a context manager
+    """
+    print('%s %s' % (output_prefix.get(), value))
+    return profiler.span(value, 'detail')
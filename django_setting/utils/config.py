@@ -0,0 +1,201 @@
+import hashlib
+import json
+import os
+import threading
+
+from .fs import atomic_write, file_hash
+
+__all__ = (
+    'CONFIG_MODES',
+    'ConfigLayer',
+    'ConfigResolver',
+    'deep_merge',
+)
+
+CONFIG_MODES = ('debug', 'deploy')
+
+
+def deep_merge(base, override):
+    """
+    Returns a new dict of 'base' updated with 'override', merging nested dicts
+    (same rule as codes/settings/config_loader used by the generated settings)
+
+    :param base: dict
+    :param override: dict whose values replace the values of 'base'
+    :return: merged dict
+    """
+    merged = dict(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = deep_merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+class ConfigLayer:
+    """
+    One JSON config file, read on first access and read again only when it changed
+
+    A changed stat (mtime, size) makes the file be read again,
+    but it is parsed again only when the hash of its content changed.
+    A missing file is an empty layer.
+
+    설정 JSON파일 하나, 처음 접근할 때 읽고 파일이 바뀐 경우에만 다시 읽음
+    """
+
+    def __init__(self, name, path):
+        self.name = name
+        self.path = path
+        self.stat = None
+        self.hash = None
+        self.version = 0
+        self._data = None
+
+    def _get_stat(self):
+        try:
+            stat = os.stat(self.path)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    @property
+    def is_loaded(self):
+        return self._data is not None
+
+    def refresh(self):
+        """
+        :return: True if the content of the layer changed
+        """
+        stat = self._get_stat()
+        if self.is_loaded and stat == self.stat:
+            return False
+        self.stat = stat
+        content = b'{}'
+        if stat is not None:
+            with open(self.path, 'rb') as f:
+                content = f.read()
+        content_hash = hashlib.sha256(content).hexdigest()
+        if self.is_loaded and content_hash == self.hash:
+            return False
+        self.hash = content_hash
+        self._data = json.loads(content.decode('utf-8'))
+        self.version += 1
+        return True
+
+    @property
+    def data(self):
+        """
+        Parsed dict of the layer, the same object until the file changes
+        (values written into it are kept until the file is read again)
+        """
+        if not self.is_loaded:
+            self.refresh()
+        return self._data
+
+    def serialize(self):
+        return json.dumps(self.data, indent=4, sort_keys=True).encode('utf-8')
+
+    def save(self):
+        """
+        Write the layer dict to the file if its content differs from the file
+        (the file is replaced atomically, an unchanged layer is not written)
+
+        :return: True if the file was written
+        """
+        content = self.serialize()
+        content_hash = hashlib.sha256(content).hexdigest()
+        stat = self._get_stat()
+        if stat is not None:
+            # 읽은 뒤 파일이 바뀌지 않았으면 기록된 hash 사용
+            disk_hash = self.hash if stat == self.stat else file_hash(self.path)
+            if disk_hash == content_hash:
+                return False
+        atomic_write(self.path, content, mode_from=self.path if stat is not None else None)
+        self.stat = self._get_stat()
+        self.hash = content_hash
+        self.version += 1
+        return True
+
+
+class ConfigResolver:
+    """
+    Layers of a project config (.config/settings_public.json, .config_secret/settings_*.json)
+    and the resolved view of each mode (common layer deep-merged with the mode layer)
+
+    Layers are loaded lazily, the resolved view of a mode is kept
+    until one of its layers changes.
+
+    프로젝트 설정파일들과 모드(debug, deploy)별로 병합된 설정
+    """
+
+    def __init__(self, project_dir):
+        self.project_dir = project_dir
+        self.config_dir = os.path.join(project_dir, '.config')
+        self.config_secret_dir = os.path.join(project_dir, '.config_secret')
+        self.layer_files = {
+            'public': os.path.join(self.config_dir, 'settings_public.json'),
+            'common': os.path.join(self.config_secret_dir, 'settings_common.json'),
+        }
+        for mode in CONFIG_MODES:
+            self.layer_files[mode] = os.path.join(
+                self.config_secret_dir, 'settings_%s.json' % mode)
+        self._layers = {}
+        self._views = {}
+        self._lock = threading.Lock()
+
+    def layer(self, name):
+        """
+        :param name: 'public', 'common' or a mode
+        :return: ConfigLayer
+        """
+        if name not in self._layers:
+            with self._lock:
+                if name not in self._layers:
+                    self._layers[name] = ConfigLayer(name, self.layer_files[name])
+        return self._layers[name]
+
+    @property
+    def public(self):
+        return self.layer('public').data
+
+    @property
+    def common(self):
+        return self.layer('common').data
+
+    def reload(self):
+        """
+        Read again the loaded layers whose file changed
+
+        :return: list of names of the changed layers
+        """
+        changed = [name for name, layer in list(self._layers.items()) if layer.refresh()]
+        if changed:
+            self.invalidate()
+        return changed
+
+    def invalidate(self):
+        """
+        Drop the resolved views (after values were written into the layer dicts)
+        """
+        self._views.clear()
+
+    def resolve(self, mode):
+        """
+        :param mode: 'debug' or 'deploy'
+        :return: dict {'public': public layer, 'secret': common layer deep-merged with the mode layer}
+        """
+        layers = (self.layer('public'), self.layer('common'), self.layer(mode))
+        for layer in layers:
+            if not layer.is_loaded:
+                layer.refresh()
+        key = tuple(layer.version for layer in layers)
+        view = self._views.get(mode)
+        if view is not None and view[0] == key:
+            return view[1]
+        resolved = {
+            'public': layers[0].data,
+            'secret': deep_merge(layers[1].data, layers[2].data),
+        }
+        self._views[mode] = (key, resolved)
+        return resolved
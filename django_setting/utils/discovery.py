@@ -0,0 +1,176 @@
+import json
+import os
+import re
+import tempfile
+import threading
+
+from .common import get_cache_dir, get_pyenv_root
+
+__all__ = (
+    'PyenvIndex',
+    'get_pyenv_index',
+    'version_sort_key',
+)
+
+RE_STABLE_VERSION = re.compile(r'^[0-9]+\.[0-9]+\.[0-9]+$')
+
+
+def version_sort_key(version):
+    """
+    Sort key comparing the numeric parts of a version string (ex: 3.10.1 > 3.9.12)
+    """
+    return [int(part) if part.isdigit() else part for part in re.split(r'([0-9]+)', version)]
+
+
+class PyenvIndex:
+    """
+    Index of pyenv versions and virtualenvs read from $PYENV_ROOT without running pyenv
+    The index is kept in a cache file and rebuilt when the mtime of a scanned directory changes.
+
+    pyenv명령어를 실행하지 않고 $PYENV_ROOT를 직접 읽어 만든 버전, 가상환경 목록
+    """
+
+    def __init__(self, pyenv_root=None, cache_file=None):
+        self.pyenv_root = pyenv_root or get_pyenv_root()
+        self.versions_dir = os.path.join(self.pyenv_root, 'versions')
+        self.definitions_dir = os.path.join(
+            self.pyenv_root, 'plugins', 'python-build', 'share', 'python-build')
+        self.cache_file = cache_file or os.path.join(get_cache_dir(), 'pyenv-index.json')
+        self.data = None
+        # startproject --manifest에서 여러 thread가 같은 index를 사용
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _get_mtime(path):
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _get_signature(self, versions):
+        directories = [self.versions_dir, self.definitions_dir] + [
+            os.path.join(self.versions_dir, version, 'envs') for version in versions]
+        return {directory: self._get_mtime(directory) for directory in directories}
+
+    def _is_valid(self, data):
+        return (data is not None and data.get('pyenv_root') == self.pyenv_root and
+                data['signature'] == self._get_signature(data['versions']))
+
+    @staticmethod
+    def _is_virtualenv_link(entry):
+        # pyenv-virtualenv가 만드는 versions/<env_name> -> versions/<version>/envs/<env_name>
+        return entry.is_symlink() and os.path.basename(
+            os.path.dirname(os.path.realpath(entry.path))) == 'envs'
+
+    def _scan(self):
+        versions = []
+        virtualenvs = {}
+        if os.path.isdir(self.versions_dir):
+            with os.scandir(self.versions_dir) as entries:
+                for entry in entries:
+                    # 가상환경의 별칭 링크는 제외 (다른 곳에 설치된 python으로의 링크는 버전으로 포함)
+                    if not entry.is_dir() or self._is_virtualenv_link(entry):
+                        continue
+                    versions.append(entry.name)
+                    envs_dir = os.path.join(entry.path, 'envs')
+                    if not os.path.isdir(envs_dir):
+                        continue
+                    with os.scandir(envs_dir) as env_entries:
+                        for env_entry in env_entries:
+                            if env_entry.is_dir():
+                                virtualenvs[env_entry.name] = env_entry.path
+        versions.sort(key=version_sort_key)
+
+        install_list = []
+        if os.path.isdir(self.definitions_dir):
+            install_list = sorted(os.listdir(self.definitions_dir), key=version_sort_key)
+        return {
+            'pyenv_root': self.pyenv_root,
+            'signature': self._get_signature(versions),
+            'versions': versions,
+            'virtualenvs': virtualenvs,
+            'install_list': install_list,
+        }
+
+    def load(self, refresh=False):
+        """
+        Returns the index data, from memory, the cache file or a new scan (in that order)
+
+        :param refresh: scan again even if the cached index looks valid
+        """
+        with self._lock:
+            if not refresh and self._is_valid(self.data):
+                return self.data
+            data = None
+            if not refresh:
+                try:
+                    data = json.loads(open(self.cache_file).read())
+                except (OSError, ValueError):
+                    data = None
+            if not self._is_valid(data):
+                data = self._scan()
+                self._write_cache(data)
+            self.data = data
+            return data
+
+    def _write_cache(self, data):
+        # 다른 process와 겹치지 않는 임시파일에 기록한 뒤 교체
+        fd, tmp_file = tempfile.mkstemp(
+            dir=os.path.dirname(self.cache_file), prefix='.pyenv-index.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wt') as f:
+                f.write(json.dumps(data))
+            os.replace(tmp_file, self.cache_file)
+        except BaseException:
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+            raise
+
+    @property
+    def versions(self):
+        """
+        :return: installed python versions (ex: [2.7.12, 3.6.1, 3.6.2])
+        """
+        return self.load()['versions']
+
+    @property
+    def virtualenvs(self):
+        """
+        :return: dict of virtualenv name: virtualenv path
+        """
+        return self.load()['virtualenvs']
+
+    @property
+    def install_list(self):
+        """
+        :return: versions installable with 'pyenv install', empty if python-build is not found
+        """
+        return self.load()['install_list']
+
+    def get_virtualenv_path(self, env_name):
+        """
+        The index is validated by directory mtimes only, which can miss a virtualenv
+        created within the mtime granularity (ex: several projects created at once),
+        so a missing name is looked up again in a new scan.
+
+        :return: Path of the virtualenv, None if it does not exist
+        """
+        path = self.virtualenvs.get(env_name)
+        if path is None:
+            path = self.load(refresh=True)['virtualenvs'].get(env_name)
+        return path
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_pyenv_index():
+    """
+    Returns the PyenvIndex shared in this process
+    """
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = PyenvIndex()
+        return _index
@@ -0,0 +1,201 @@
+import contextlib
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+
+__all__ = (
+    'atomic_write',
+    'file_hash',
+    'file_lock',
+    'SyncResult',
+    'sync_tree',
+)
+
+
+def atomic_write(path, data, mode_from=None, permissions=None):
+    """
+    Write 'data' to a temporary file next to 'path' and move it over 'path',
+    so readers never see a partially written file
+
+    :param path: file path
+    :param data: str or bytes
+    :param mode_from: file whose permission bits are copied to 'path'
+    :param permissions: permission bits of 'path' (ex: 0o600), set before it is visible
+    """
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # thread, process마다 다른 임시파일, 권한이 지정되면 데이터를 쓰기 전에 그 권한으로 생성
+    # (지정되지 않으면 open()과 같이 0o666에 umask 적용)
+    fd, tmp_path = _create_tmp_file(path, 0o666 if permissions is None else permissions)
+    try:
+        if permissions is not None:
+            os.fchmod(fd, permissions)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        if mode_from:
+            shutil.copymode(mode_from, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _create_tmp_file(path, mode):
+    """
+    Create a new temporary file next to 'path' (like tempfile.mkstemp, with 'mode')
+
+    :return: (file descriptor, temporary file path)
+    """
+    directory, name = os.path.split(path)
+    while True:
+        tmp_path = os.path.join(directory, '.%s.%s.tmp' % (name, os.urandom(6).hex()))
+        try:
+            return os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, mode), tmp_path
+        except FileExistsError:
+            continue
+
+
+@contextlib.contextmanager
+def file_lock(path):
+    """
+    Hold an exclusive lock (flock) on the file 'path' while in the block,
+    waiting for other processes that hold it
+
+    다른 process와 공유하는 파일, 디렉터리를 수정하는 동안 사용하는 lock
+    :param path: lock file path (created if missing, never removed)
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o666)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        # fd를 닫으면 lock도 해제됨
+        os.close(fd)
+
+
+def file_hash(path):
+    """
+    :return: sha256 hex digest of the content of 'path'
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _get_stat(path):
+    try:
+        stat = os.stat(path)
+        return [stat.st_mtime_ns, stat.st_size]
+    except OSError:
+        return None
+
+
+def _walk_files(root):
+    """
+    :return: sorted list of file paths relative to 'root'
+    """
+    paths = []
+    for dir_path, dir_names, file_names in os.walk(root):
+        dir_names.sort()
+        for file_name in file_names:
+            paths.append(os.path.relpath(os.path.join(dir_path, file_name), root))
+    return sorted(paths)
+
+
+class SyncResult:
+    def __init__(self):
+        self.copied = []
+        self.unchanged = []
+        self.kept = []
+
+    def __str__(self):
+        return 'copied %d, unchanged %d, kept %d edited' % (
+            len(self.copied), len(self.unchanged), len(self.kept))
+
+
+def sync_tree(src, dst, manifest_name='.manifest.json', force=False, seed_only=()):
+    """
+    Copy the files of 'src' into 'dst', only the ones added or changed since the last sync
+
+    'dst/<manifest_name>' records the hash of each copied file and the stat and hash of
+    both copies, so an unchanged file costs two stat calls.
+    Files edited in 'dst' after they were copied are kept unless 'force' is True.
+    Files removed from 'src' are left in 'dst'.
+
+    src의 파일 중 추가, 변경된 파일만 dst로 복사 (dst에서 수정된 파일은 force가 아니면 유지)
+    :param src: source directory
+    :param dst: destination directory
+    :param manifest_name: name of the manifest file in 'dst'
+    :param force: overwrite files edited in 'dst'
+    :param seed_only: relative paths copied only when missing in 'dst'
+                      (files written in 'dst' afterwards, ex: config layers)
+    :return: SyncResult
+    """
+    manifest_file = os.path.join(dst, manifest_name)
+    try:
+        manifest = json.loads(open(manifest_file).read())
+    except (OSError, ValueError):
+        manifest = {}
+
+    result = SyncResult()
+    new_manifest = {}
+    for rel_path in _walk_files(src):
+        src_path = os.path.join(src, rel_path)
+        dst_path = os.path.join(dst, rel_path)
+        if rel_path in seed_only:
+            if not os.path.exists(dst_path):
+                atomic_write(dst_path, open(src_path, 'rb').read(), mode_from=src_path)
+                result.copied.append(rel_path)
+            continue
+        entry = manifest.get(rel_path)
+        src_stat = _get_stat(src_path)
+        dst_stat = _get_stat(dst_path)
+
+        # stat이 그대로면 기록된 hash를 사용해 파일을 읽지 않음
+        if entry and entry['src_stat'] == src_stat:
+            src_hash = entry['src_hash']
+        else:
+            src_hash = file_hash(src_path)
+        if dst_stat is None:
+            dst_hash = None
+        elif entry and entry['dst_stat'] == dst_stat:
+            dst_hash = entry['dst_hash']
+        else:
+            dst_hash = file_hash(dst_path)
+        # 마지막으로 복사한 내용 (dst에서 수정되었는지 판단하는 기준)
+        copied_hash = entry['hash'] if entry else None
+
+        if dst_hash == src_hash:
+            copied_hash = src_hash
+            result.unchanged.append(rel_path)
+        elif dst_hash is None or dst_hash == copied_hash or force:
+            atomic_write(dst_path, open(src_path, 'rb').read(), mode_from=src_path)
+            dst_stat = _get_stat(dst_path)
+            dst_hash = copied_hash = src_hash
+            result.copied.append(rel_path)
+        else:
+            result.kept.append(rel_path)
+        new_manifest[rel_path] = {
+            'hash': copied_hash,
+            'src_hash': src_hash,
+            'src_stat': src_stat,
+            'dst_hash': dst_hash,
+            'dst_stat': dst_stat,
+        }
+
+    if new_manifest != manifest:
+        atomic_write(manifest_file, json.dumps(new_manifest, indent=4, sort_keys=True))
+    return result
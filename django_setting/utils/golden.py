@@ -0,0 +1,161 @@
+import fnmatch
+import os
+import shutil
+import tempfile
+
+from .cls import Pyenv
+from .common import get_cache_dir, get_pyenv_root
+from .fs import file_lock
+from .runner import runner
+from .wheelhouse import Wheelhouse
+
+__all__ = (
+    'GoldenEnv',
+)
+
+
+def link_or_copy(src, dst):
+    """
+    Hardlink 'src' to 'dst', copying when a hardlink is not possible (ex: across devices)
+    """
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+class GoldenEnv:
+    """
+    Prebuilt virtualenv per (python version, base packages), cloned into new pyenv virtualenvs
+
+    python 버전과 기본 패키지 목록별로 미리 만들어둔 가상환경을 복제해 새 pyenv 가상환경을 만든다
+
+    The files of a clone are hardlinks to the golden virtualenv's files, except the ones
+    pip rewrites in place (COPY_PATTERNS) and the ones containing the golden path.
+    pip replaces or removes the other files when it upgrades a package, which leaves the
+    golden virtualenv and the other clones as they were; editing a file of site-packages
+    in place (ex: open(path, 'w')) changes it in all of them.
+    복제본의 파일은 golden의 하드링크 (pip이 그 자리에서 다시 쓰는 파일은 복사)
+    """
+    COMPLETE_FILE = '.golden-complete'
+    # pip, setuptools가 그 자리에서 다시 쓰는 파일 (하드링크면 golden과 다른 복제본까지 바뀜)
+    COPY_PATTERNS = ('*.pth', 'RECORD')
+
+    def __init__(self, python_version, packages, wheelhouse=None, root=None):
+        self.python_version = python_version
+        self.packages = tuple(packages)
+        self.wheelhouse = wheelhouse or Wheelhouse()
+        self.root = root or get_cache_dir('golden')
+        self.name = Wheelhouse.get_key(python_version, self.packages)
+        self.path = os.path.join(self.root, self.name)
+
+    @property
+    def is_built(self):
+        return os.path.exists(os.path.join(self.path, self.COMPLETE_FILE))
+
+    @property
+    def lock_file(self):
+        return self.path + '.lock'
+
+    def build(self, refresh=False):
+        """
+        Create the golden virtualenv with the pyenv python and install the base packages
+
+        The virtualenv is built in a temporary directory under a file lock and moved into
+        place when complete, so concurrent processes build it once and never see it half built.
+        다른 process와 동시에 실행되어도 한번만 생성 (임시 디렉터리에 생성 후 이동)
+        :return: Path of the golden virtualenv
+        """
+        if self.is_built and not refresh:
+            return self.path
+        with file_lock(self.lock_file):
+            # lock을 기다리는 동안 다른 process가 생성을 끝냈으면 그대로 사용
+            if self.is_built and not refresh:
+                return self.path
+            build_path = tempfile.mkdtemp(prefix='.%s.' % self.name, dir=self.root)
+            old_path = build_path + '.old'
+            try:
+                os.chmod(build_path, 0o755)
+                python = os.path.join(
+                    get_pyenv_root(), 'versions', self.python_version, 'bin', 'python')
+                runner.run_sync([python, '-m', 'venv', build_path])
+                self.wheelhouse.install(Pyenv(build_path), self.python_version, self.packages,
+                                        refresh=refresh)
+                # 완료 파일에 생성한 경로를 기록 (bin의 script, pyvenv.cfg에 들어있는 경로,
+                # clone에서 새 경로로 교체)
+                with open(os.path.join(build_path, self.COMPLETE_FILE), 'wt') as f:
+                    f.write(build_path)
+                if os.path.exists(self.path):
+                    os.replace(self.path, old_path)
+                os.replace(build_path, self.path)
+            finally:
+                shutil.rmtree(build_path, ignore_errors=True)
+                shutil.rmtree(old_path, ignore_errors=True)
+        return self.path
+
+    def _copy_file(self, src, dst):
+        """
+        copytree's copy_function: hardlink, except the files matching COPY_PATTERNS
+        """
+        name = os.path.basename(src)
+        if any(fnmatch.fnmatch(name, pattern) for pattern in self.COPY_PATTERNS):
+            shutil.copy2(src, dst)
+        else:
+            link_or_copy(src, dst)
+
+    def clone(self, env_name):
+        """
+        Clone the golden virtualenv as the pyenv virtualenv 'env_name'
+        Files are hardlinked, and the ones containing the golden path
+        (scripts in bin, pyvenv.cfg) are rewritten as new files.
+        An existing virtualenv 'env_name' is removed and cloned again.
+
+        :param env_name: virtualenv's name
+        :return: Path of the cloned virtualenv
+        """
+        pyenv_root = get_pyenv_root()
+        env_path = os.path.join(pyenv_root, 'versions', self.python_version, 'envs', env_name)
+        # 이전에 남은 가상환경(중간에 실패한 복제 등)은 삭제 후 다시 복제
+        if os.path.lexists(env_path):
+            if os.path.islink(env_path) or not os.path.isdir(env_path):
+                os.remove(env_path)
+            else:
+                shutil.rmtree(env_path)
+        os.makedirs(os.path.dirname(env_path), exist_ok=True)
+        # build()가 golden 디렉터리를 교체하는 동안 복사하지 않도록 같은 lock 사용
+        with file_lock(self.lock_file):
+            shutil.copytree(self.path, env_path, symlinks=True, copy_function=self._copy_file)
+        complete_file = os.path.join(env_path, self.COMPLETE_FILE)
+        # golden이 생성된 경로 (이전 버전의 완료 파일은 비어있음)
+        build_path = open(complete_file).read() or self.path
+        os.remove(complete_file)
+
+        replacements = (
+            (build_path.encode('utf-8'), env_path.encode('utf-8')),
+            (os.path.basename(build_path).encode('utf-8'), env_name.encode('utf-8')),
+            (self.name.encode('utf-8'), env_name.encode('utf-8')),
+        )
+        bin_dir = os.path.join(env_path, 'bin')
+        rewrite_paths = [os.path.join(env_path, 'pyvenv.cfg')] + [
+            os.path.join(bin_dir, name) for name in os.listdir(bin_dir)]
+        for path in rewrite_paths:
+            if os.path.islink(path) or not os.path.isfile(path):
+                continue
+            content = open(path, 'rb').read()
+            if build_path.encode('utf-8') not in content:
+                continue
+            for old, new in replacements:
+                content = content.replace(old, new)
+            # 하드링크된 원본(golden)이 바뀌지 않도록 새 파일을 만들어 교체
+            tmp_path = path + '.tmp'
+            open(tmp_path, 'wb').write(content)
+            shutil.copymode(path, tmp_path)
+            os.replace(tmp_path, path)
+
+        # pyenv가 'env_name'으로 가상환경을 찾을 수 있도록 versions/<env_name> 링크 생성
+        link_path = os.path.join(pyenv_root, 'versions', env_name)
+        if os.path.islink(link_path) and os.readlink(link_path) != env_path:
+            os.remove(link_path)
+        if not os.path.lexists(link_path):
+            os.symlink(env_path, link_path)
+        return env_path
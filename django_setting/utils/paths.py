@@ -1,6 +1,7 @@
-import json
 import os
 
+from .config import ConfigResolver
+
 ROOT_DIR = os.path.dirname(os.path.dirname(__file__))
 BASE_DIR = os.path.join(ROOT_DIR, 'django_app')
 CONF_DIR = os.path.join(ROOT_DIR, '.config')
@@ -12,18 +13,18 @@ CONF_SECRET_COMMON_FILE = os.path.join(CONF_SECRET_DIR, 'settings_common.json')
 CONF_SECRET_DEBUG_FILE = os.path.join(CONF_SECRET_DIR, 'settings_debug.json')
 CONF_SECRET_DEPLOY_FILE = os.path.join(CONF_SECRET_DIR, 'settings_deploy.json')
 
-# Secret config
-if not os.path.exists(CONF_SECRET_DIR):
-    os.makedirs(CONF_SECRET_DIR)
-if not os.path.exists(CONF_SECRET_COMMON_FILE):
-    open(CONF_SECRET_COMMON_FILE, 'wt').write('{}')
-if not os.path.exists(CONF_SECRET_DEBUG_FILE):
-    open(CONF_SECRET_DEBUG_FILE, 'wt').write('{}')
-if not os.path.exists(CONF_SECRET_DEPLOY_FILE):
-    open(CONF_SECRET_DEPLOY_FILE, 'wt').write('{}')
+config = ConfigResolver(ROOT_DIR)
+
+# 설정 dict는 import할 때가 아니라 처음 접근할 때 읽음 (없는 파일은 빈 dict)
+CONFIG_LAYERS = {
+    'config_public': 'public',
+    'config_secret_common': 'common',
+    'config_secret_debug': 'debug',
+    'config_secret_deploy': 'deploy',
+}
+
 
-# Public config (Docker)
-config_public = json.loads(open(CONF_PUBLIC_FILE).read())
-config_secret_common = json.loads(open(CONF_SECRET_COMMON_FILE).read())
-config_secret_debug = json.loads(open(CONF_SECRET_DEBUG_FILE).read())
-config_secret_deploy = json.loads(open(CONF_SECRET_DEPLOY_FILE).read())
+def __getattr__(name):
+    if name in CONFIG_LAYERS:
+        return config.layer(CONFIG_LAYERS[name]).data
+    raise AttributeError('module %r has no attribute %r' % (__name__, name))
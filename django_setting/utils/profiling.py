@@ -0,0 +1,137 @@
+import contextvars
+import json
+import os
+import threading
+import time
+
+__all__ = (
+    'Span',
+    'Profiler',
+    'profiler',
+)
+
+
+class Span:
+    """
+    Timing record of a command, step or subprocess, usable as a context manager
+    child_time is the CPU time (user + system) of the subprocesses run inside the span:
+    the runner sets it on each subprocess span from the rusage of the process,
+    and every span adds it up to its parent when it ends.
+
+    명령어, 단계, 서브프로세스의 실행시간, 서브프로세스 CPU 시간 기록
+    """
+
+    def __init__(self, profiler, name, kind):
+        self.profiler = profiler
+        self.name = name
+        self.kind = kind
+        self.parent = None
+        self.thread_id = None
+        self.start = None
+        self.end = None
+        self.child_time = 0.0
+        self.status = None
+        self._token = None
+
+    def __enter__(self):
+        self.thread_id = threading.get_ident()
+        self.parent = self.profiler.current_span
+        self._token = self.profiler.push(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.end = time.perf_counter()
+        if self.status is None:
+            self.status = 'error' if exc_type else 'ok'
+        self.profiler.pop(self._token)
+        # 서브프로세스 CPU 시간을 부모 span에 합산
+        if self.parent is not None and self.child_time:
+            self.parent.add_child_time(self.child_time)
+        self.profiler.record(self)
+        return False
+
+    def add_child_time(self, child_time):
+        # 동시에 실행되는 단계들이 같은 부모에 더하므로 lock 사용
+        with self.profiler._lock:
+            self.child_time += child_time
+
+    @property
+    def wall_time(self):
+        return self.end - self.start
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'kind': self.kind,
+            'parent': self.parent.name if self.parent else None,
+            'thread': self.thread_id,
+            'start': self.start - self.profiler.origin,
+            'wall_time': self.wall_time,
+            'child_time': self.child_time,
+            'status': self.status,
+        }
+
+
+class Profiler:
+    """
+    Collects spans of every command, step and subprocess run by django_setting
+    The report is a JSON file in the Chrome trace event format (chrome://tracing, speedscope)
+    The current span is a context variable, so the spans of concurrent asyncio tasks
+    and of the threads started with a copied context get the right parent.
+
+    django_setting이 실행하는 명령어, 단계, 서브프로세스의 실행시간을 수집
+    """
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.spans = []
+        self._lock = threading.Lock()
+        self._current_span = contextvars.ContextVar('current_span', default=None)
+
+    @property
+    def current_span(self):
+        return self._current_span.get()
+
+    def push(self, span):
+        """
+        :return: token to pass to pop
+        """
+        return self._current_span.set(span)
+
+    def pop(self, token):
+        self._current_span.reset(token)
+
+    def record(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    def span(self, name, kind='step'):
+        return Span(self, name, kind)
+
+    def get_report(self):
+        spans = sorted(self.spans, key=lambda span: span.start)
+        trace_events = [{
+            'name': span.name,
+            'cat': span.kind,
+            'ph': 'X',
+            'ts': (span.start - self.origin) * 1000000,
+            'dur': span.wall_time * 1000000,
+            'pid': os.getpid(),
+            'tid': span.thread_id,
+            'args': {
+                'child_time': span.child_time,
+                'status': span.status,
+            },
+        } for span in spans]
+        return {
+            'spans': [span.to_dict() for span in spans],
+            'traceEvents': trace_events,
+            'displayTimeUnit': 'ms',
+        }
+
+    def write_report(self, path):
+        open(path, 'wt').write(json.dumps(self.get_report(), indent=4))
+
+
+profiler = Profiler()
@@ -0,0 +1,215 @@
+import asyncio
+import contextvars
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+from .profiling import profiler
+
+__all__ = (
+    'CommandError',
+    'CommandResult',
+    'Runner',
+    'runner',
+    'output_prefix',
+)
+
+# 현재 context의 모든 출력 앞에 붙는 prefix
+# (startproject --manifest에서 동시에 생성되는 프로젝트들의 출력을 구분, ex: '[auth] ')
+output_prefix = contextvars.ContextVar('output_prefix', default='')
+
+
+class CommandResult:
+    def __init__(self, cmd, returncode, stdout, stderr, wall_time, timed_out=False,
+                 cpu_time=None):
+        self.cmd = cmd
+        self.returncode = returncode
+        self.stdout = stdout
+        self.stderr = stderr
+        self.wall_time = wall_time
+        self.timed_out = timed_out
+        # 프로세스와 프로세스가 기다린 자식들의 CPU 시간 (user + system)
+        self.cpu_time = cpu_time
+
+    def __repr__(self):
+        return 'CommandResult({!r}, returncode={})'.format(self.cmd, self.returncode)
+
+
+class CommandError(Exception):
+    def __init__(self, result):
+        self.result = result
+        if result.timed_out:
+            reason = 'timed out after {:.1f}s'.format(result.wall_time)
+        else:
+            reason = 'exited with status {}'.format(result.returncode)
+        message = 'Command "{}" {}'.format(result.cmd, reason)
+        output = (result.stderr or result.stdout).strip()
+        if output:
+            message += '\n' + '\n'.join(output.splitlines()[-20:])
+        super().__init__(message)
+
+
+class Runner:
+    """
+    asyncio based subprocess runner shared by the scaffold, docker and pyenv commands
+
+    - at most 'limit' commands run at once in the whole process (across threads and loops);
+      callers run in parallel with threads (scheduler, bulk), each with its own run_sync loop
+    - a timed out, cancelled or failed run kills its process and releases its slot
+    - stdout/stderr are captured, and optionally streamed with a prefix per line
+    - a non-zero exit status or a timeout raises CommandError (check=True)
+    - the runner reaps each process itself with os.wait4, so its rusage (CPU time)
+      is recorded on the subprocess span (asyncio's child watcher would discard it)
+    - streamed lines are written under 'print_lock'; hold it to print between them
+
+    scaffold, docker, pyenv 명령어들이 공유하는 asyncio 기반 서브프로세스 실행기
+    """
+
+    def __init__(self, limit=None, timeout=None):
+        self.limit = limit or int(os.environ.get('DJANGO_SETTING_JOBS', 0)) or os.cpu_count() or 4
+        self.timeout = timeout
+        self._semaphore = threading.BoundedSemaphore(self.limit)
+        self.print_lock = threading.Lock()
+
+    async def _read_stream(self, pipe, lines, output, prefix):
+        loop = asyncio.get_running_loop()
+        stream = asyncio.StreamReader()
+        transport, _ = await loop.connect_read_pipe(
+            lambda: asyncio.StreamReaderProtocol(stream), pipe)
+        try:
+            while True:
+                line = await stream.readline()
+                if not line:
+                    break
+                line = line.decode('utf-8', 'replace')
+                lines.append(line)
+                if output:
+                    with self.print_lock:
+                        output.write('{}{}'.format(prefix, line))
+                        output.flush()
+        finally:
+            transport.close()
+
+    @staticmethod
+    def _wait(process):
+        """
+        Reap 'process' with os.wait4 in a thread of its own
+        (like asyncio's threaded child watcher, a shared executor could be full of waiting runs)
+
+        :return: future of the CPU time (user + system) of the process
+                 and of the children it waited for
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def set_result(method, value):
+            if not future.done():
+                method(value)
+
+        def wait():
+            try:
+                _, status, rusage = os.wait4(process.pid, 0)
+            except OSError as e:
+                loop.call_soon_threadsafe(set_result, future.set_exception, e)
+                return
+            process.returncode = os.waitstatus_to_exitcode(status)
+            loop.call_soon_threadsafe(
+                set_result, future.set_result, rusage.ru_utime + rusage.ru_stime)
+
+        threading.Thread(target=wait, name='wait-%d' % process.pid, daemon=True).start()
+        return future
+
+    async def _acquire(self):
+        """
+        Wait for a free slot of the semaphore (threading, shared with the other loops)
+
+        If the waiting task is cancelled, the slot acquired later is given back,
+        so a cancelled run never keeps a permit
+        대기 중인 task가 취소되면 나중에 얻은 slot을 바로 반납
+        """
+        loop = asyncio.get_running_loop()
+        acquire = loop.run_in_executor(None, self._semaphore.acquire)
+        try:
+            await asyncio.shield(acquire)
+        except asyncio.CancelledError:
+            acquire.add_done_callback(lambda future: self._semaphore.release())
+            raise
+
+    @staticmethod
+    def _kill(process):
+        """
+        Kill 'process' and its process group (ex: the children of 'sh -c') if not reaped yet
+        (os.killpg instead of Popen.kill, whose poll() would reap it before the wait4 thread)
+        """
+        if process.returncode is None:
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+    async def run(self, cmd, cwd=None, env=None, timeout=None, check=True, stream=False,
+                  prefix=''):
+        """
+        Run 'cmd' (str: through the shell, list: exec) and wait for it
+
+        :param timeout: seconds, default Runner.timeout
+        :param check: raise CommandError if the command fails or times out
+        :param stream: print the output lines while the command runs
+        :param prefix: string printed before each streamed line (ex: '[debug] ')
+        :return: CommandResult
+        """
+        timeout = self.timeout if timeout is None else timeout
+        prefix = output_prefix.get() + prefix
+        name = cmd if isinstance(cmd, str) else ' '.join(cmd)
+        await self._acquire()
+        try:
+            with profiler.span(name, 'subprocess') as span:
+                start = time.perf_counter()
+                process = subprocess.Popen(
+                    cmd, shell=isinstance(cmd, str), cwd=cwd, env=env, start_new_session=True,
+                    stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+                waiter = self._wait(process)
+                stdout_lines = []
+                stderr_lines = []
+                timed_out = False
+                try:
+                    await asyncio.wait_for(asyncio.gather(
+                        self._read_stream(process.stdout, stdout_lines,
+                                          sys.stdout if stream else None, prefix),
+                        self._read_stream(process.stderr, stderr_lines,
+                                          sys.stderr if stream else None, prefix),
+                        asyncio.shield(waiter),
+                    ), timeout)
+                except asyncio.TimeoutError:
+                    timed_out = True
+                finally:
+                    # timeout, 취소(CancelledError) 등 어떤 이유로 끝나도 자식 프로세스를 남기지 않음
+                    self._kill(process)
+                    cpu_time = await waiter
+                span.status = process.returncode
+                span.child_time = cpu_time
+                result = CommandResult(
+                    cmd=name,
+                    returncode=process.returncode,
+                    stdout=''.join(stdout_lines),
+                    stderr=''.join(stderr_lines),
+                    wall_time=time.perf_counter() - start,
+                    timed_out=timed_out,
+                    cpu_time=cpu_time,
+                )
+        finally:
+            self._semaphore.release()
+        if check and (timed_out or result.returncode != 0):
+            raise CommandError(result)
+        return result
+
+    def run_sync(self, cmd, **kwargs):
+        """
+        Run a single command from synchronous code (see Runner.run for the arguments)
+        """
+        return asyncio.run(self.run(cmd, **kwargs))
+
+runner = Runner()
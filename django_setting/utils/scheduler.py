@@ -0,0 +1,156 @@
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from .profiling import profiler
+from .runner import output_prefix
+
+__all__ = (
+    'Step',
+    'StepScheduler',
+)
+
+
+class Step:
+    def __init__(self, name, func, requires=(), profile=True):
+        self.name = name
+        self.func = func
+        self.requires = tuple(requires)
+        self.profile = profile
+        self.start = None
+        self.end = None
+
+    def __repr__(self):
+        return 'Step({})'.format(self.name)
+
+    @property
+    def duration(self):
+        if self.start is None or self.end is None:
+            return 0.0
+        return self.end - self.start
+
+
+class StepScheduler:
+    """
+    Run steps as a dependency graph, overlapping steps that do not depend on each other
+
+    서로 의존하지 않는 단계들을 동시에 실행하는 의존성 그래프 스케줄러
+    """
+
+    def __init__(self, max_workers=4):
+        self.max_workers = max_workers
+        self.steps = {}
+
+    def add(self, name, func, requires=(), profile=True):
+        """
+        :param requires: names of the steps to finish before this one
+        :param profile: record the step as a profiler span
+                        (False if 'func' records its own span, ex: with print_cmd_step(...))
+        """
+        if name in self.steps:
+            raise ValueError('Step "%s" is already registered' % name)
+        self.steps[name] = Step(name, func, requires, profile)
+        return self.steps[name]
+
+    def validate(self):
+        """
+        Check that every required step exists and the graph has no cycle
+
+        :return: list(Step) in topological order
+        """
+        for step in self.steps.values():
+            for required in step.requires:
+                if required not in self.steps:
+                    raise ValueError('Step "%s" requires unknown step "%s"' % (step.name, required))
+        ordered = []
+        marks = {}
+
+        def visit(step):
+            if marks.get(step.name) == 'done':
+                return
+            if marks.get(step.name) == 'visiting':
+                raise ValueError('Dependency cycle detected at step "%s"' % step.name)
+            marks[step.name] = 'visiting'
+            for required in step.requires:
+                visit(self.steps[required])
+            marks[step.name] = 'done'
+            ordered.append(step)
+
+        for step in self.steps.values():
+            visit(step)
+        return ordered
+
+    def run(self):
+        """
+        Execute all steps, starting each one as soon as its requirements are done.
+        The first failing step cancels the pending ones and its exception is re-raised.
+        """
+        self.validate()
+        done = set()
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while len(done) < len(self.steps):
+                for step in self.steps.values():
+                    if step.name in done or step in running.values():
+                        continue
+                    if all(required in done for required in step.requires):
+                        # 실행한 thread의 context (output prefix)를 각 단계에서도 사용
+                        context = contextvars.copy_context()
+                        running[executor.submit(context.run, self._run_step, step)] = step
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    step = running.pop(future)
+                    exception = future.exception()
+                    if exception is not None:
+                        for pending in running:
+                            pending.cancel()
+                        raise exception
+                    done.add(step.name)
+
+    @staticmethod
+    def _run_step(step):
+        step.start = time.perf_counter()
+        try:
+            if step.profile:
+                with profiler.span(step.name, 'step'):
+                    step.func()
+            else:
+                step.func()
+        finally:
+            step.end = time.perf_counter()
+
+    @property
+    def critical_path(self):
+        """
+        The chain of steps whose durations add up to the longest path through the graph
+
+        :return: list(Step), from the first step to the last
+        """
+        finish = {}
+        previous = {}
+        for step in self.validate():
+            before = max(step.requires, key=lambda name: finish[name], default=None)
+            previous[step.name] = before
+            finish[step.name] = (finish[before] if before else 0.0) + step.duration
+        if not finish:
+            return []
+        name = max(finish, key=finish.get)
+        path = []
+        while name:
+            path.append(self.steps[name])
+            name = previous[name]
+        return path[::-1]
+
+    @property
+    def total_duration(self):
+        return sum(step.duration for step in self.steps.values())
+
+    def print_report(self):
+        path = self.critical_path
+        prefix = output_prefix.get()
+        print(prefix + 'Critical path ({:.2f}s of {:.2f}s total step time):'.format(
+            sum(step.duration for step in path),
+            self.total_duration,
+        ))
+        for step in path:
+            print(prefix + '  {:.2f}s  {}'.format(step.duration, step.name))
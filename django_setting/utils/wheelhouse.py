@@ -0,0 +1,108 @@
+import hashlib
+import json
+import os
+import shlex
+import shutil
+import time
+
+from .common import get_cache_dir
+from .runner import CommandError
+
+__all__ = (
+    'Wheelhouse',
+)
+
+
+def quote_args(args):
+    """
+    Join 'args' into a shell command line, quoting each one (ex: 'django>=2.0' is not a redirect)
+    """
+    return ' '.join(shlex.quote(arg) for arg in args)
+
+
+class Wheelhouse:
+    """
+    Local wheel cache keyed by python version and package set
+
+    python 버전과 패키지 목록별로 wheel파일을 보관하는 로컬 캐시
+    """
+    METADATA_FILE = 'wheelhouse.json'
+
+    def __init__(self, root=None, keep=5):
+        self.root = root or get_cache_dir('wheelhouse')
+        self.keep = keep
+
+    @staticmethod
+    def get_key(python_version, packages):
+        packages_hash = hashlib.sha256(
+            '\n'.join(sorted(packages)).encode('utf-8')).hexdigest()[:12]
+        return '{}-{}'.format(python_version, packages_hash)
+
+    def get_path(self, python_version, packages):
+        return os.path.join(self.root, self.get_key(python_version, packages))
+
+    def is_filled(self, python_version, packages):
+        return os.path.exists(os.path.join(self.get_path(python_version, packages),
+                                           self.METADATA_FILE))
+
+    def fill(self, pyenv, python_version, packages, refresh=False):
+        """
+        Build wheels of 'packages' with the pip of 'pyenv' into the wheelhouse
+
+        :param pyenv: Pyenv instance whose pip downloads and builds the wheels
+        :param refresh: remove the existing wheels and build again
+        :return: Path of the filled wheelhouse
+        """
+        path = self.get_path(python_version, packages)
+        if refresh and os.path.exists(path):
+            shutil.rmtree(path)
+        if self.is_filled(python_version, packages):
+            return path
+        os.makedirs(path, exist_ok=True)
+        try:
+            pyenv.call('pip wheel --wheel-dir %s %s' % (shlex.quote(path), quote_args(packages)))
+        except CommandError:
+            # 패키지 인덱스에 접근할 수 없는 경우 등 (install에서 일반 pip install로 대체)
+            shutil.rmtree(path)
+            return None
+        metadata = {
+            'python_version': python_version,
+            'packages': sorted(packages),
+            'created': time.time(),
+        }
+        open(os.path.join(path, self.METADATA_FILE), 'wt').write(
+            json.dumps(metadata, indent=4, sort_keys=True))
+        self.evict()
+        return path
+
+    def install(self, pyenv, python_version, packages, cwd=None, refresh=False):
+        """
+        Install 'packages' into 'pyenv' from the wheelhouse without touching the package index.
+        Falls back to a normal pip install if the wheelhouse can not be filled.
+        """
+        path = self.fill(pyenv, python_version, packages, refresh=refresh)
+        if not path:
+            pyenv.call('pip install %s' % quote_args(packages), cwd=cwd)
+            return
+        # 최근 사용 시각을 갱신해 evict대상에서 제외
+        os.utime(os.path.join(path, self.METADATA_FILE))
+        pyenv.call('pip install --no-index --find-links %s %s' % (
+            shlex.quote(path), quote_args(packages)), cwd=cwd)
+
+    def evict(self, keep=None):
+        """
+        Remove all but the 'keep' most recently used wheelhouses
+
+        :return: list of removed wheelhouse keys
+        """
+        keep = self.keep if keep is None else keep
+        entries = []
+        for name in os.listdir(self.root):
+            metadata_file = os.path.join(self.root, name, self.METADATA_FILE)
+            if os.path.exists(metadata_file):
+                entries.append((os.path.getmtime(metadata_file), name))
+        entries.sort(reverse=True)
+        removed = [name for _, name in entries[keep:]]
+        for name in removed:
+            shutil.rmtree(os.path.join(self.root, name))
+        return removed
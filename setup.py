@@ -9,6 +9,7 @@ setup(
     license='MIT',
     packages=[
         'django_setting',
+        'django_setting.bench',
         'django_setting.docker',
         'django_setting.startproject',
         'django_setting.removeproject',
@@ -18,6 +19,7 @@ setup(
     package_data={
         'django_setting': [
             'files/*',
+            'files/bench/*',
             'files/config/*',
             'files/config/docker/**/*',
             'files/config/nginx/**/*',
@@ -27,6 +29,10 @@ setup(
             'codes/**/*',
         ]
     },
+    extras_require={
+        'seal': ['cryptography'],
+        'yaml': ['pyyaml'],
+    },
     zip_safe=False,
     scripts=['bin/django-setting'],
 )